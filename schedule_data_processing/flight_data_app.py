@@ -11,19 +11,29 @@ import os
 import sys
 import json
 import logging
+import itertools
 import argparse
-from datetime import datetime
+import signal
+import threading
+import contextlib
+from datetime import datetime, timedelta
 #from schedule_data_processing.package.data_processor import FlightDataProcessor
-from package.data_processor import FlightDataProcessor
+from package.data_processor import FlightDataProcessor, SOURCE_FILES
+from package.utilization import compute_utilization
+from package.result_diff import diff_files
+from package.watcher import SourceWatcher
+from package.itinerary import ConnectionIndex
 
 class FlightLookupApp:
 
-    def __init__(self, config):
+    def __init__(self, config, shared_dataset=None):
         """
         Initializes the FlightLookupApp with the provided configuration.
 
         Args:
             config (dict): The configuration dictionary.
+            shared_dataset (str): Name of a dataset published by 'publish' mode. If provided, the app attaches
+                to it read-only instead of downloading and processing the source files itself.
         """
         # Determine project root dynamically based on the location of requirements.txt
         project_root = self.find_project_root()
@@ -33,8 +43,6 @@ class FlightLookupApp:
 
         # Use absolute paths for directories and files
         config["log_directory"] = os.path.join(project_root, config["log_directory"])
-        log_filename = f"data_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        config["log_filepath"] = os.path.join(config["log_directory"], log_filename)
 
         # Create the log directory if it doesn't exist
         os.makedirs(config["log_directory"], exist_ok=True)
@@ -43,11 +51,16 @@ class FlightLookupApp:
         config["data_directory"] = os.path.join(project_root, config["data_directory"])
         config["result_directory"] = os.path.join(project_root, config["result_directory"])
         config["config_directory"] = os.path.join(project_root, config["config_directory"])
+        config["cache_directory"] = os.path.join(project_root, config.get("cache_directory", "cache"))
 
         # Update the initialization of FlightDataProcessor
-        self.data_processor = FlightDataProcessor(config)
+        self.data_processor = FlightDataProcessor(config, shared_worker=bool(shared_dataset))
+        config["log_filepath"] = self.data_processor.log_filepath
         self.data_processor.import_libraries()
-        self.data_processor.get_data()
+        if shared_dataset:
+            self.data_processor.attach_shared(shared_dataset)
+        else:
+            self.data_processor.get_data()
 
         # Store the configuration in the instance
         self.config = config
@@ -60,13 +73,19 @@ class FlightLookupApp:
             current_directory = os.path.dirname(current_directory)
         raise FileNotFoundError("Could not find project root with requirements.txt file.")
 
-    def perform_operation(self, mode, flight_numbers=None):
+    def perform_operation(self, mode, flight_numbers=None, shared_dataset=None, diff_paths=None, watch_options=None,
+                          itinerary_options=None):
         """
         Perform flight lookup or merge operation based on the specified mode.
 
         Args:
-            mode (str): The mode of operation, either 'lookup' or 'merge'.
+            mode (str): The mode of operation: 'lookup', 'merge', 'utilization', 'publish', 'diff', 'watch' or
+                'itinerary'.
             flight_numbers (list): A list of flight numbers for lookup operation.
+            shared_dataset (str): The shared memory segment name for publish operation.
+            diff_paths (tuple): The old, new and delta file paths for diff operation; None selects the default.
+            watch_options (dict): Keyword arguments for run_watch.
+            itinerary_options (dict): Keyword arguments for run_itinerary, including origin and destination.
 
         Returns:
             str: JSON representation of results for lookup, or the path of the merged result file for merge.
@@ -82,7 +101,6 @@ class FlightLookupApp:
             schedule, fleet, airports = (
                 self.data_processor.schedule, self.data_processor.fleet, self.data_processor.airports
             )
-            self.data_processor.calculate_distances()
 
             # Ensure flight_numbers is a list of separate flight numbers
             flight_numbers = flight_numbers[0].split(",") if flight_numbers else None
@@ -103,11 +121,26 @@ class FlightLookupApp:
                 return json.dumps(results, default=str)
 
             elif mode == "merge":
-                result_path = self.merge_data(schedule, fleet, airports)
+                result_path = self.run_merge()
                 return result_path
 
+            elif mode == "utilization":
+                return self.run_utilization()
+
+            elif mode == "publish":
+                return self.run_publish(shared_dataset)
+
+            elif mode == "diff":
+                return self.run_diff(*(diff_paths or ()))
+
+            elif mode == "watch":
+                return self.run_watch(**(watch_options or {}))
+
+            elif mode == "itinerary":
+                return self.run_itinerary(**(itinerary_options or {}))
+
             else:
-                error_message = f"Unsupported mode: {mode}. Supported modes are 'lookup' and 'merge'."
+                error_message = f"Unsupported mode: {mode}. Supported modes are 'lookup', 'merge', 'utilization', 'publish', 'diff', 'watch' and 'itinerary'."
                 logging.error(error_message)
                 raise ValueError(error_message)
 
@@ -130,11 +163,9 @@ class FlightLookupApp:
         Raises:
             ValueError: If the flight number is not found.
         """
-        self.modify_fleet_dataframe(fleet)
-        joined = schedule.merge(fleet, on="aircraft_registration")
-        result = joined[joined.flight_number == flight_number]
+        lookup_index = self.get_lookup_index(schedule, fleet)
 
-        if result.empty:
+        if flight_number not in lookup_index.index:
             error_message = f"Flight {flight_number} not found."
             logging.error(error_message)
             error_result = {"error": error_message}
@@ -143,7 +174,7 @@ class FlightLookupApp:
 
         logging.info(f"Successfully looked up flight {flight_number}.")
 
-        result = result.to_dict(orient="records")[0]  # Extract the first (and only) record from the list
+        result = lookup_index.loc[[flight_number]].to_dict(orient="records")[0]  # Extract the first (and only) record from the list
 
         keys_to_delete = ["F", "C", "E", "M", "RangeLower", "RangeUpper", "Reg"]
         for key in keys_to_delete:
@@ -162,6 +193,102 @@ class FlightLookupApp:
 
         return result
 
+    def get_lookup_index(self, schedule, fleet):
+        """
+        Returns the schedule/fleet join indexed by flight number, building it on first use.
+
+        The join is cached for the given schedule and fleet objects so that batch lookups
+        resolve each flight with an index probe instead of re-merging the full datasets.
+
+        Args:
+            schedule (DataFrame): The schedule data.
+            fleet (DataFrame): The fleet data.
+
+        Returns:
+            DataFrame: The first joined record of every flight number, indexed by flight number.
+        """
+        # Workers attached to a shared dataset use the index published with it
+        shared_frames = self.data_processor.shared_frames or {}
+        if "lookup" in shared_frames:
+            return shared_frames["lookup"]
+
+        cached = getattr(self, "_lookup_index", None)
+        if cached is not None and cached[0] is schedule and cached[1] is fleet:
+            return cached[2]
+
+        self.modify_fleet_dataframe(fleet)
+        joined = schedule.merge(fleet, on="aircraft_registration")
+        lookup_index = joined.drop_duplicates("flight_number").set_index("flight_number", drop=False)
+        lookup_index.index.name = None
+
+        self._lookup_index = (schedule, fleet, lookup_index)
+        return lookup_index
+
+    def read_flight_numbers(self, source):
+        """
+        Lazily reads flight numbers from a file or stdin.
+
+        Flight numbers may be given one per line, comma-separated, or both.
+
+        Args:
+            source (str): Path of the input file, or '-' to read from stdin.
+
+        Yields:
+            str: The next flight number.
+        """
+        input_file = sys.stdin if source == "-" else open(source, "r")
+        try:
+            for line in input_file:
+                for flight_number in line.split(","):
+                    flight_number = flight_number.strip()
+                    if flight_number:
+                        yield flight_number
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+
+    def stream_lookup(self, flight_numbers):
+        """
+        Looks up flights one at a time, yielding each result as soon as it is resolved.
+
+        Args:
+            flight_numbers (iterable): The flight numbers to look up.
+
+        Yields:
+            dict: The lookup result, or a dictionary with an "error" key, for each flight.
+        """
+        schedule, fleet = self.data_processor.schedule, self.data_processor.fleet
+        for flight_number in flight_numbers:
+            try:
+                yield self.lookup_flight(flight_number, schedule, fleet)
+            except ValueError as e:
+                yield {"error": str(e)}
+
+    def write_ndjson(self, records, output=None):
+        """
+        Writes records as newline-delimited JSON, flushing after every record.
+
+        Args:
+            records (iterable): The records to write.
+            output (str): Path of the output file. Results go to stdout if not provided.
+
+        Returns:
+            int: The number of records written.
+        """
+        output_file = open(output, "w") if output else sys.stdout
+        count = 0
+        try:
+            for record in records:
+                output_file.write(json.dumps(record, default=str) + "\n")
+                output_file.flush()
+                count += 1
+        finally:
+            if output_file is not sys.stdout:
+                output_file.close()
+
+        logging.info(f"Streamed {count} lookup results to {output or 'stdout'}.")
+        return count
+
     def modify_fleet_dataframe(self, fleet):
         """
         Modifies the fleet DataFrame by adding an 'aircraft_registration' column.
@@ -173,7 +300,7 @@ class FlightLookupApp:
 
     def merge_data(self, schedule, fleet, airports):
         """
-        Modifies the fleet DataFrame by adding an 'aircraft_registration' column.
+        Joins the schedule, fleet and airports data and writes the result to CSV.
 
         Args:
             schedule (DataFrame: The schedule data.
@@ -181,73 +308,454 @@ class FlightLookupApp:
             airports (DataFrame): The airports data.
         """
         try:
-            self.modify_fleet_dataframe(fleet)
-            # Rename 'aircraft_registration' column in fleet to avoid suffix
-            fleet = fleet.rename(columns={'aircraft_registration': 'aircraft_registration_fleet'})
+            joined = self.join_data(schedule, fleet, airports)
+            output_path = self.write_results(joined)
 
-            # Merge Schedule and Fleet based on aircraft_registration
-            joined = schedule.merge(fleet, left_on="aircraft_registration", right_on="aircraft_registration_fleet", how="inner")
+            #logging.info(f"Content of the response:\n{joined[output_columns].to_dict(orient='list')}")
+            print(f"Merge process completed! Result file created in : {output_path}")
+            return ""
 
-            if joined.empty:
-                logging.error("No matches found during merge.")
-                raise ValueError("No matches found during merge.")
+        except Exception as e:
+            logging.exception(f"An unexpected error occurred in merge_data: {str(e)}")
+            raise
 
-            logging.info("Successfully performed merge operation.")
+    def run_merge(self):
+        """
+        Runs the join and CSV stages through the data processor's pipeline.
 
-            # Merge with Airports for arrival_airport only
-            joined = joined.merge(airports, left_on="arrival_airport", right_on="Airport", how="inner", suffixes=("", "_arrival"))
+        Stages whose inputs are unchanged since the last run are served from the pipeline cache,
+        so an unchanged dataset does not rewrite the result file.
+        """
+        try:
+            output_path = self.get_output_path()
+            pipeline = self.data_processor.pipeline
+            pipeline.add_stage(
+                "joins", self.join_data, inputs=["distances", "fleet", "airports"],
+                config={"policy": self.config.get("integrity_policy", "drop")}, version="1",
+            )
+            pipeline.add_stage(
+                "csv", self.write_results, inputs=["joins"], config={"output_path": output_path},
+                outputs=[output_path], version="1",
+            )
+            pipeline.run("csv")
 
-            # Merge with Airports for departure_airport only
-            joined = joined.merge(airports, left_on="departure_airport", right_on="Airport", how="inner", suffixes=("", "_departure"))
+            print(f"Merge process completed! Result file created in : {output_path}")
+            return ""
 
-            # Drop redundant or not-required columns
-            columns_to_drop = [
-                "aircraft_registration_fleet",
-                "Reg",
-                # Add more columns if needed
-            ]
-            joined.drop(columns=columns_to_drop, inplace=True)
+        except Exception as e:
+            logging.exception(f"An unexpected error occurred in run_merge: {str(e)}")
+            raise
 
-            # Drop additional columns with '_arrival' and '_departure' suffix
-            columns_to_drop_arrival = [
-                col for col in joined.columns if col.endswith(("_arrival", "_departure")) and col not in ["arrival_airport", "departure_airport"]
-            ]
-            joined.drop(columns=columns_to_drop_arrival, inplace=True)
+    def run_utilization(self):
+        """
+        Computes aircraft utilization through the pipeline and writes the per-registration and per-type reports.
 
-            # Output to CSV
-            output_columns = list(joined.columns)
-            output_directory = self.config["result_directory"]
-            output_path = os.path.join(output_directory, "Flight_results.csv")
+        Returns:
+            str: JSON summary of the per-type utilization.
+        """
+        try:
+            pipeline = self.data_processor.pipeline
+            pipeline.add_stage("utilization", compute_utilization, inputs=["distances", "fleet"], version="1")
+            by_registration, by_type = pipeline.run("utilization")
 
-            # Create the directory if it doesn't exist
-            os.makedirs(output_directory, exist_ok=True)
+            output_directory = os.path.dirname(self.get_output_path())
+            registration_path = os.path.join(output_directory, "Utilization_by_registration.csv")
+            type_path = os.path.join(output_directory, "Utilization_by_type.csv")
+            by_registration.to_csv(registration_path, index=False)
+            by_type.to_csv(type_path, index=False)
 
-            joined.to_csv(output_path, columns=output_columns, index=False)
+            logging.info(f"Utilization reports written to {registration_path} and {type_path}.")
+            print(f"Utilization reports created in : {output_directory}")
+            return by_type.to_json(orient="records")
 
-            #logging.info(f"Content of the response:\n{joined[output_columns].to_dict(orient='list')}")
-            print(f"Merge process completed! Result file created in : {output_path}")
-            return ""
+        except Exception as e:
+            logging.exception(f"An unexpected error occurred in run_utilization: {str(e)}")
+            raise
+
+    def run_itinerary(self, origin=None, destination=None, date=None, max_stops=None, min_connect=None,
+                      max_connect=None, limit=None):
+        """
+        Searches itineraries between two airports through the connection index pipeline stage.
+
+        Options left as None default to the 'itinerary' section of the configuration.
+
+        Args:
+            origin (str): The origin airport code.
+            destination (str): The destination airport code.
+            date (str): Only consider first legs departing on this date (YYYY-MM-DD).
+            max_stops (int): The maximum number of intermediate stops.
+            min_connect (int): The minimum connection time in minutes.
+            max_connect (int): The maximum connection time in minutes.
+            limit (int): The maximum number of itineraries returned.
+
+        Returns:
+            str: JSON list of itineraries, earliest arrival first.
+
+        Raises:
+            ValueError: If origin or destination is missing, or an option is invalid.
+        """
+        if not origin or not destination:
+            raise ValueError("For 'itinerary' mode, an origin and a destination airport must be provided.")
+
+        settings = self.config.get("itinerary", {})
+        depart_after = depart_before = None
+        if date:
+            try:
+                depart_after = datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Invalid date: {date}. Expected YYYY-MM-DD.")
+            depart_before = depart_after + timedelta(days=1) - timedelta(minutes=1)
+
+        pipeline = self.data_processor.pipeline
+        pipeline.add_stage("connections", ConnectionIndex, inputs=["distances", "fleet"], version="1")
+        connection_index = pipeline.run("connections")
+
+        itineraries = connection_index.search(
+            origin.upper(), destination.upper(), depart_after, depart_before,
+            max_stops=settings.get("max_stops", 2) if max_stops is None else max_stops,
+            min_connect=settings.get("min_connect_minutes", 45) if min_connect is None else min_connect,
+            max_connect=settings.get("max_connect_minutes", 180) if max_connect is None else max_connect,
+            limit=settings.get("limit", 10) if limit is None else limit,
+        )
+        if not itineraries:
+            logging.info(f"No itinerary found from {origin} to {destination}.")
+        return json.dumps(itineraries)
+
+    def run_publish(self, name=None):
+        """
+        Publishes the enriched datasets to shared memory and serves them until interrupted.
+
+        Worker processes attach with FlightLookupApp(config, shared_dataset=name). The segment is
+        unlinked when this process receives SIGINT or SIGTERM.
+
+        Args:
+            name (str): The shared memory segment name. Defaults to 'shared_dataset_name' in the configuration.
+
+        Returns:
+            str: The name of the segment that was published.
+        """
+        name = name or self.config.get("shared_dataset_name", "zerog_flight_data")
+        # Workers resolve lookups from the published index instead of each joining its own copy
+        lookup_index = self.get_lookup_index(self.data_processor.schedule, self.data_processor.fleet)
+        shm = self.data_processor.publish_shared(
+            name, {"lookup": lookup_index.reset_index(drop=True)}, {"lookup": "flight_number"}
+        )
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        print(f"Published shared dataset '{name}' ({shm.size} bytes). Press Ctrl+C to stop.")
+        try:
+            while not stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shm.close()
+            shm.unlink()
+            logging.info(f"Unpublished shared dataset {name}.")
+
+        return name
+
+    def run_watch(self, source=None, interval=None, debounce=None):
+        """
+        Keeps the merged result up to date by re-running the pipeline whenever a source file changes.
 
+        Only the stages downstream of the changed sources are recomputed: an airports change re-runs
+        the integrity, distance and join stages, while a fleet change leaves distances cached unless
+        the integrity check drops different legs.
+
+        Args:
+            source (str): 'blob' to poll blob ETags, or 'local' to poll the files in the data directory.
+            interval (float): Seconds between polls.
+            debounce (float): Seconds a change must stay stable before the pipeline is re-run.
+
+        Returns:
+            str: An empty string once the watch is stopped with Ctrl+C or SIGTERM.
+        """
+        settings = self.config.get("watch", {})
+        source = source or settings.get("source", "blob")
+        interval = interval if interval is not None else settings.get("interval", 30)
+        debounce = debounce if debounce is not None else settings.get("debounce", 5)
+
+        processor = self.data_processor
+        pipeline = processor.pipeline
+        watcher = SourceWatcher(
+            SOURCE_FILES, lambda name: processor.source_fingerprint(name, source), interval, debounce
+        )
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+        self.run_merge()
+        print(f"Watching {source} sources every {interval}s. Press Ctrl+C to stop.")
+        try:
+            while True:
+                changed = watcher.wait_for_changes(stop)
+                if not changed:
+                    break
+
+                pipeline.report.clear()
+                try:
+                    processor.refresh_data(changed, download=source == "blob")
+                    self.run_merge()
+                except Exception as e:
+                    # Keep serving the previous data and try the changed sources again on the next poll
+                    logging.error(f"Refresh of {', '.join(sorted(changed))} failed: {str(e)}")
+                    print(f"Refresh failed, keeping the previous data: {str(e)}")
+                    watcher.retry(changed)
+                    continue
+
+                recomputed = [name for name, status, _ in pipeline.report if status == "miss"]
+                print(f"Sources changed: {', '.join(sorted(changed))}; recomputed: {', '.join(recomputed) or 'nothing'}")
+        except KeyboardInterrupt:
+            pass
+
+        logging.info("Watch stopped.")
+        return ""
+
+    def join_data(self, schedule, fleet, airports):
+        """
+        Joins the schedule with the fleet and with the departure and arrival airports.
+
+        Args:
+            schedule (DataFrame): The schedule data.
+            fleet (DataFrame): The fleet data.
+            airports (DataFrame): The airports data.
+
+        Returns:
+            DataFrame: The joined data.
+
+        Raises:
+            ValueError: If no schedule entry matches the fleet.
+        """
+        # Orphan legs kept by the integrity stage keep null fleet and airport data instead of dropping out
+        how = "left" if self.config.get("integrity_policy", "drop") == "keep" else "inner"
+
+        self.modify_fleet_dataframe(fleet)
+        # Rename 'aircraft_registration' column in fleet to avoid suffix
+        fleet = fleet.rename(columns={'aircraft_registration': 'aircraft_registration_fleet'})
+
+        if how == "left":
+            # Orphan rows get nulls, which would turn integer columns into floats for every row
+            fleet, airports = self.nullable_integers(fleet), self.nullable_integers(airports)
+
+        # Merge Schedule and Fleet based on aircraft_registration
+        joined = schedule.merge(fleet, left_on="aircraft_registration", right_on="aircraft_registration_fleet", how=how)
+
+        if joined.empty:
+            logging.error("No matches found during merge.")
+            raise ValueError("No matches found during merge.")
+
+        logging.info("Successfully performed merge operation.")
+
+        # Merge with Airports for arrival_airport only
+        joined = joined.merge(airports, left_on="arrival_airport", right_on="Airport", how=how, suffixes=("", "_arrival"))
+
+        # Merge with Airports for departure_airport only
+        joined = joined.merge(airports, left_on="departure_airport", right_on="Airport", how=how, suffixes=("", "_departure"))
+
+        # Drop redundant or not-required columns
+        columns_to_drop = [
+            "aircraft_registration_fleet",
+            "Reg",
+            # Add more columns if needed
+        ]
+        joined.drop(columns=columns_to_drop, inplace=True)
+
+        # Drop additional columns with '_arrival' and '_departure' suffix
+        columns_to_drop_arrival = [
+            col for col in joined.columns if col.endswith(("_arrival", "_departure")) and col not in ["arrival_airport", "departure_airport"]
+        ]
+        joined.drop(columns=columns_to_drop_arrival, inplace=True)
+
+        return joined
+
+    def nullable_integers(self, frame):
+        """
+        Returns the frame with its integer columns converted to the nullable Int64 dtype.
+
+        Args:
+            frame (DataFrame): The data to convert.
+
+        Returns:
+            DataFrame: The converted data.
+        """
+        return frame.astype({column: "Int64" for column in frame.select_dtypes("integer").columns})
+
+    def get_output_path(self):
+        """
+        Returns the path of the merged result file, creating the result directory if needed.
+        """
+        output_directory = self.config["result_directory"]
+
+        # Create the directory if it doesn't exist
+        os.makedirs(output_directory, exist_ok=True)
+
+        return os.path.join(output_directory, "Flight_results.csv")
+
+    def write_results(self, joined):
+        """
+        Writes the joined data to the merged result CSV file.
+
+        Args:
+            joined (DataFrame): The joined data.
+
+        Returns:
+            str: The path of the result file.
+        """
+        # Output to CSV
+        output_columns = list(joined.columns)
+        output_path = self.get_output_path()
+
+        # Keep the previous result as a snapshot so that 'diff' mode can compute what changed
+        if os.path.exists(output_path):
+            os.replace(output_path, self.get_snapshot_path())
+
+        joined.to_csv(output_path, columns=output_columns, index=False)
+        return output_path
+
+    def get_snapshot_path(self):
+        """
+        Returns the path of the snapshot of the previous merged result file.
+        """
+        return os.path.join(os.path.dirname(self.get_output_path()), "Flight_results.previous.csv")
+
+    def run_diff(self, old_path=None, new_path=None, delta_path=None):
+        """
+        Compares two merge outputs and writes the added, removed and modified legs to a delta file.
+
+        Args:
+            old_path (str): The previous merge output. Defaults to the snapshot kept by the last merge.
+            new_path (str): The current merge output. Defaults to the merged result file.
+            delta_path (str): The delta file to write. Defaults to 'Flight_results_delta.ndjson'.
+
+        Returns:
+            str: JSON summary with the number of added, removed and modified legs.
+
+        Raises:
+            ValueError: If either merge output does not exist.
+        """
+        output_path = self.get_output_path()
+        old_path = old_path or self.get_snapshot_path()
+        new_path = new_path or output_path
+        delta_path = delta_path or os.path.join(os.path.dirname(output_path), "Flight_results_delta.ndjson")
+
+        for path in (old_path, new_path):
+            if not os.path.exists(path):
+                raise ValueError(f"Merge output not found: {path}. Run 'merge' at least twice or pass --old/--new.")
+
+        try:
+            summary = diff_files(old_path, new_path, delta_path)
+            return json.dumps(summary)
         except Exception as e:
-            logging.exception(f"An unexpected error occurred in merge_data: {str(e)}")
+            logging.exception(f"An unexpected error occurred in run_diff: {str(e)}")
             raise
-        
-    def main(self, args):
+
+    def run_streaming_lookup(self, args):
+        """
+        Runs lookup mode with NDJSON output, taking flight numbers from argv and/or --input.
+
+        Args:
+            args (Namespace): The parsed command-line arguments.
+        """
+        flight_numbers = [number for arg in args.flight_numbers for number in arg.split(",") if number]
+        if args.input:
+            flight_numbers = itertools.chain(flight_numbers, self.read_flight_numbers(args.input))
+        elif not flight_numbers:
+            raise ValueError("For 'lookup' mode, at least one flight number must be provided.")
+
+        logging.info("Performing streaming lookup operation.")
+        self.write_ndjson(self.stream_lookup(flight_numbers), args.output)
+
+    @staticmethod
+    def parse_arguments(args):
+        """
+        Parses the command line.
+
+        Args:
+            args (list): The command line, including the program name.
+
+        Returns:
+            Namespace: The parsed arguments.
+        """
         parser = argparse.ArgumentParser(description="Flight Data Lookup and Merge")
-        parser.add_argument("mode", choices=["lookup", "merge"], help="Mode of operation")
+        parser.add_argument("mode", choices=["lookup", "merge", "utilization", "publish", "diff", "watch", "itinerary"], help="Mode of operation")
+        parser.add_argument("--explain", action="store_true", help="Show which pipeline stages were cache hits or misses")
 
         # Flight numbers are only required for the "lookup" mode
         if "lookup" in args:
-            parser.add_argument("flight_numbers", nargs="+", help="Comma-separated flight numbers for lookup mode")
+            parser.add_argument("flight_numbers", nargs="*", help="Comma-separated flight numbers for lookup mode")
+            parser.add_argument("--ndjson", action="store_true", help="Stream one JSON record per line as each flight is resolved")
+            parser.add_argument("--input", help="Read flight numbers from a file, or '-' for stdin (implies --ndjson)")
+            parser.add_argument("--output", help="Write streamed results to a file instead of stdout (implies --ndjson)")
+
+        if "publish" in args:
+            parser.add_argument("--name", help="Shared memory segment name (defaults to shared_dataset_name in config)")
+
+        if "diff" in args:
+            parser.add_argument("--old", help="Previous merge output (defaults to the snapshot kept by the last merge)")
+            parser.add_argument("--new", help="Current merge output (defaults to the merged result file)")
+            parser.add_argument("--delta", help="Delta file to write (defaults to Result/Flight_results_delta.ndjson)")
+
+        if "watch" in args:
+            parser.add_argument("--source", choices=["blob", "local"], help="Poll blob ETags or local files (defaults to watch.source in config)")
+            parser.add_argument("--interval", type=float, help="Seconds between polls (defaults to watch.interval in config)")
+            parser.add_argument("--debounce", type=float, help="Seconds a change must settle before re-running (defaults to watch.debounce in config)")
+
+        if "itinerary" in args:
+            parser.add_argument("origin", help="Origin airport code")
+            parser.add_argument("destination", help="Destination airport code")
+            parser.add_argument("--date", help="Only depart on this date, YYYY-MM-DD (defaults to any date)")
+            parser.add_argument("--max-stops", type=int, choices=[0, 1, 2], help="Maximum number of stops (defaults to itinerary.max_stops in config)")
+            parser.add_argument("--min-connect", type=int, help="Minimum connection time in minutes (defaults to itinerary.min_connect_minutes in config)")
+            parser.add_argument("--max-connect", type=int, help="Maximum connection time in minutes (defaults to itinerary.max_connect_minutes in config)")
+            parser.add_argument("--limit", type=int, help="Maximum number of itineraries (defaults to itinerary.limit in config)")
+
+        return parser.parse_intermixed_args(args[1:])
+
+    @staticmethod
+    def streams_to_stdout(args):
+        """
+        Returns whether the parsed command streams NDJSON lookup results to stdout.
+
+        Args:
+            args (Namespace): The parsed command-line arguments.
+        """
+        return args.mode == "lookup" and bool(args.ndjson or args.input) and not args.output
 
-        args = parser.parse_args(args[1:])
+    def main(self, args):
+        args = self.parse_arguments(args)
 
         try:
-            result = self.perform_operation(args.mode, getattr(args, "flight_numbers", None))
-            print(result)
+            if args.mode == "lookup" and (args.ndjson or args.input or args.output):
+                self.run_streaming_lookup(args)
+            else:
+                diff_paths = (getattr(args, "old", None), getattr(args, "new", None), getattr(args, "delta", None))
+                watch_options = {
+                    "source": getattr(args, "source", None),
+                    "interval": getattr(args, "interval", None),
+                    "debounce": getattr(args, "debounce", None),
+                }
+                itinerary_options = {
+                    "origin": getattr(args, "origin", None),
+                    "destination": getattr(args, "destination", None),
+                    "date": getattr(args, "date", None),
+                    "max_stops": getattr(args, "max_stops", None),
+                    "min_connect": getattr(args, "min_connect", None),
+                    "max_connect": getattr(args, "max_connect", None),
+                    "limit": getattr(args, "limit", None),
+                }
+                result = self.perform_operation(
+                    args.mode, getattr(args, "flight_numbers", None), getattr(args, "name", None), diff_paths,
+                    watch_options, itinerary_options,
+                )
+                print(result)
         except ValueError as e:
             print(f"Error: {str(e)}")
 
+        if args.explain:
+            # Keep the explanation off stdout so that streamed results stay valid NDJSON
+            print("\n".join(self.data_processor.pipeline.explain()), file=sys.stderr)
+
 if __name__ == "__main__":
     # Determine project root dynamically based on the location of requirements.txt
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -262,5 +770,14 @@ if __name__ == "__main__":
     except FileNotFoundError:
         raise FileNotFoundError(f"Config file not found at {config_file_path}")
 
-    app = FlightLookupApp(config)
+    # Streamed lookup results own stdout, so progress messages printed while loading the data go to stderr
+    arguments = FlightLookupApp.parse_arguments(sys.argv)
+    progress_stream = sys.stderr if FlightLookupApp.streams_to_stdout(arguments) else sys.stdout
+    try:
+        with contextlib.redirect_stdout(progress_stream):
+            app = FlightLookupApp(config)
+    except ValueError as e:
+        # Loading stops on invalid data, e.g. orphan legs under the 'fail' integrity policy
+        print(f"Error: {str(e)}")
+        sys.exit(1)
     app.main(sys.argv)
\ No newline at end of file
@@ -8,31 +8,52 @@
 import os
 import json
 import sys
+import tempfile
 import subprocess
 import importlib
 import logging
-import re
-from unidecode import unidecode
-from datetime import datetime
+import functools
+from .json_stream import read_json_stream, DEFAULT_BATCH_SIZE
+from .pipeline import PipelineRunner
+from .log_config import setup_logging
+from .shared_dataset import publish_frames, attach_frames
+from .integrity import check_integrity, IntegrityError
+from .normalization import normalize_column, cached_normalize, PARALLEL_THRESHOLD
+
+# Source files downloaded from blob storage, keyed by pipeline stage name
+SOURCE_FILES = {
+    "schedule": ("schedule.json", "json"),
+    "airports": ("airports.csv", "csv"),
+    "fleet": ("fleet.csv", "csv"),
+}
 
 class FlightDataProcessor:
     """
     FlightDataProcessor class handles the processing of flight data.
     It includes methods for downloading data, loading data, and performing calculations.
     """
-    def __init__(self, config):
+    def __init__(self, config, shared_worker=False):
         """
         Constructor for FlightDataProcessor.
 
         Parameters:
         - config (dict): Configuration settings for the data processor.
+        - shared_worker (bool): Whether this process is a worker attaching to a shared dataset. Workers log to
+          a file of their own, as the publisher and other workers log alongside them.
         """
         self.config = config
+        self.shared_worker = shared_worker
         self.data_directory = None
         self.schedule = None
         self.fleet = None
         self.airports = None
         self.log_directory = None 
+        self.log_filepath = None
+        self.cache_directory = None
+        self.pipeline = None
+        self.shared_memory = None
+        self.shared_frames = None
+        self.integrity_report = None
         self.create_data_directory()  
         self.setup_logging()
 
@@ -47,7 +68,8 @@ class FlightDataProcessor:
         #project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
         #project_root = os.path.abspath(os.path.dirname(__file__))
         data_directory = os.path.join(project_root, self.config.get("data_directory", "data_files"))
-        log_directory = os.path.join(project_root, "log")
+        log_directory = os.path.join(project_root, self.config.get("log_directory", "log"))
+        cache_directory = os.path.join(project_root, self.config.get("cache_directory", "cache"))
 
         try:
             # Create data directory if it does not exist
@@ -59,6 +81,7 @@ class FlightDataProcessor:
             # Set data and log directories
             self.data_directory = data_directory
             self.log_directory = log_directory
+            self.cache_directory = cache_directory
 
         except Exception as e:
             logging.error(f"Error creating data/log directories: {str(e)}")
@@ -67,14 +90,11 @@ class FlightDataProcessor:
     def setup_logging(self):
         """
         Set up logging configuration.
-        """
-        log_filename = os.path.join(self.log_directory, f"data_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-            
-        # Create log directory if it does not exist
-        #os.makedirs(self.log_directory, exist_ok=True)
 
-        # Configure logging to both file and console
-        logging.basicConfig(filename=log_filename, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        Records are queued and written to a rotating log file by a background listener,
+        using the optional 'logging' section of the configuration.
+        """
+        self.log_filepath = setup_logging(self.log_directory, self.config.get("logging"), per_process=self.shared_worker)
  
     @staticmethod
     #The find_file method doesn't rely on any instance-specific data. It operates solely on the input parameters
@@ -169,13 +189,17 @@ class FlightDataProcessor:
         with open(config_path, 'r') as f:
             return json.load(f)
 
-    def download_blob(self, blob_name, target_file_path):
+    def download_blob(self, blob_name, target_file_path, exit_on_error=True):
         """
         Download a blob from Azure Blob Storage.
 
+        The blob is written to a temporary file next to the target and only moved into place once complete, so a
+        failed download never truncates the previous copy.
+
         Parameters:
         - blob_name (str): The name of the blob to download.
         - target_file (str): The local file path to save the downloaded blob.
+        - exit_on_error (bool): Whether to exit on failure; otherwise the error is raised to the caller.
         """
         logging.info(f"Downloading blob: {blob_name}")
         connection_string = self.config["azure_storage"]["connection_string"]
@@ -185,14 +209,22 @@ class FlightDataProcessor:
         # Ensure the target file is inside the data_directory
         #target_file_path = os.path.join(self.data_directory, os.path.basename(target_file))
 
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=os.path.dirname(target_file_path) or ".", prefix=f".{os.path.basename(target_file_path)}.", suffix=".part"
+        )
         try:
-            with open(target_file_path, "wb") as f:
+            with os.fdopen(file_descriptor, "wb") as f:
                 blob.download_blob().readinto(f)
+            os.replace(temporary_path, target_file_path)
             logging.info(f"Blob {blob_name} downloaded successfully to {target_file_path}.")
             print(f"Blob {blob_name} downloaded successfully to {target_file_path}.")
         except Exception as e:
             logging.error(f"Error downloading blob {blob_name}: {str(e)}")
-            sys.exit(1)
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            if exit_on_error:
+                sys.exit(1)
+            raise
 
     def load_data(self, blob_name, target_file, file_format):
         """
@@ -201,16 +233,30 @@ class FlightDataProcessor:
         Parameters:
         - blob_name (str): The name of the blob to load.
         - target_file (str): The local file path to save the downloaded blob.
-        - file_format (str): The format of the file ('json' or 'csv').
+        - file_format (str): The format of the file ('json', 'ndjson' or 'csv'). JSON files are parsed
+          incrementally and may be gzip or zstd compressed.
 
         Returns:
         - pd.DataFrame: The loaded data in a Pandas DataFrame.
         """
         target_file_path = os.path.join(self.data_directory, os.path.basename(target_file))
         self.download_blob(blob_name, target_file_path)
+        return self.read_file(target_file_path, file_format)
+
+    def read_file(self, target_file_path, file_format):
+        """
+        Read a local data file into a Pandas DataFrame.
+
+        Parameters:
+        - target_file_path (str): The path of the file to read.
+        - file_format (str): The format of the file ('json', 'ndjson' or 'csv').
+
+        Returns:
+        - pd.DataFrame: The loaded data, or None if it could not be read.
+        """
         try:
-            if file_format == 'json':
-                return pd.read_json(target_file_path)
+            if file_format in ('json', 'ndjson'):
+                return read_json_stream(target_file_path, self.config.get("json_batch_size", DEFAULT_BATCH_SIZE))
             elif file_format == 'csv':
                 return pd.read_csv(target_file_path)
             else:
@@ -226,11 +272,52 @@ class FlightDataProcessor:
         Calculate distances between airports in the schedule and update the schedule DataFrame.
         """
         if self.schedule is not None and self.airports is not None:
-            schedule = self.schedule.copy()
-            schedule["distance_nm"] = schedule.apply(
-                lambda row: self.calculate_distance_row(row, self.airports), axis=1
-            )
-            self.schedule = schedule
+            self.schedule = self.compute_distances(self.schedule, self.airports)
+
+    def compute_distances(self, schedule, airports):
+        """
+        Return a copy of the schedule with the 'distance_nm' column added.
+
+        Airport coordinates are looked up once per airport, and each distinct departure/arrival pair is
+        measured once. Legs referencing an unknown airport get a null distance instead of failing.
+
+        Parameters:
+        - schedule (pd.DataFrame): The schedule data.
+        - airports (pd.DataFrame): DataFrame containing airport information.
+
+        Returns:
+        - pd.DataFrame: The schedule with distances in nautical miles.
+        """
+        schedule = schedule.copy()
+        airport_rows = airports.drop_duplicates("Airport")
+        coordinates = dict(zip(airport_rows["Airport"], zip(airport_rows["Lat"], airport_rows["Lon"])))
+
+        route_columns = ["departure_airport", "arrival_airport"]
+        routes = pd.MultiIndex.from_frame(schedule[route_columns].drop_duplicates())
+        route_distances = pd.Series(
+            [self.calculate_route_distance(departure, arrival, coordinates) for departure, arrival in routes],
+            dtype="float64",
+        )
+        positions = routes.get_indexer(pd.MultiIndex.from_frame(schedule[route_columns]))
+        schedule["distance_nm"] = route_distances.take(positions).to_numpy()
+        return schedule
+
+    def calculate_route_distance(self, departure_airport, arrival_airport, coordinates):
+        """
+        Calculate the distance between two airports.
+
+        Parameters:
+        - departure_airport (str): The departure airport code.
+        - arrival_airport (str): The arrival airport code.
+        - coordinates (dict): (Lat, Lon) tuples keyed by airport code.
+
+        Returns:
+        - float: The distance in nautical miles, or NaN if either airport is unknown.
+        """
+        if departure_airport not in coordinates or arrival_airport not in coordinates:
+            return float("nan")
+
+        return geodesic(coordinates[departure_airport], coordinates[arrival_airport]).nautical
 
     def calculate_distance_row(self, row, airports_df):
         """
@@ -241,16 +328,11 @@ class FlightDataProcessor:
         - airports_df (pd.DataFrame): DataFrame containing airport information.
 
         Returns:
-        - float: The calculated distance in nautical miles.
+        - float: The calculated distance in nautical miles, or NaN if either airport is unknown.
         """
-        departure_airport_info = airports_df.loc[airports_df['Airport'] == row['departure_airport']]
-        arrival_airport_info = airports_df.loc[airports_df['Airport'] == row['arrival_airport']]
-
-        departure_coords = (departure_airport_info['Lat'].values[0], departure_airport_info['Lon'].values[0])
-        arrival_coords = (arrival_airport_info['Lat'].values[0], arrival_airport_info['Lon'].values[0])
-
-        distance = geodesic(departure_coords, arrival_coords).nautical
-        return distance
+        route_airports = airports_df.loc[airports_df['Airport'].isin([row['departure_airport'], row['arrival_airport']])]
+        coordinates = dict(zip(route_airports['Airport'], zip(route_airports['Lat'], route_airports['Lon'])))
+        return self.calculate_route_distance(row['departure_airport'], row['arrival_airport'], coordinates)
 
     def perform_data_quality_checks(self, dataframe):
         """
@@ -266,8 +348,12 @@ class FlightDataProcessor:
         for column in dataframe.columns:
             # Apply cleaning function based on column type
             if dataframe[column].dtype == 'object':
-                # Clean non-English characters and format datetime
-                dataframe[column] = dataframe[column].apply(self.clean_value)
+                # Clean non-English characters and format datetime, once per distinct value
+                dataframe[column] = normalize_column(
+                    dataframe[column],
+                    self.config.get("normalization_workers"),
+                    self.config.get("normalization_parallel_threshold", PARALLEL_THRESHOLD),
+                )
 
         logging.info("Data quality checks passed successfully.")
 
@@ -281,45 +367,228 @@ class FlightDataProcessor:
         Returns:
         - Cleaned value.
         """
-        # Convert non-English characters to English equivalents
-        cleaned_value = unidecode(str(value))
+        return cached_normalize(str(value))
+    
+    def prepare_data(self, target_file_path, file_format):
+        """
+        Read a downloaded data file and run the data quality checks on it.
+
+        Parameters:
+        - target_file_path (str): The path of the downloaded file.
+        - file_format (str): The format of the file ('json', 'ndjson' or 'csv').
+
+        Returns:
+        - pd.DataFrame: The cleaned data.
+        """
+        dataframe = self.read_file(target_file_path, file_format)
+        if dataframe is not None:
+            self.perform_data_quality_checks(dataframe)
+        return dataframe
+
+    def build_pipeline(self):
+        """
+        Register the ingestion stages: one load-and-clean stage per source file, followed by distances.
 
-        # Remove extra spaces
-        cleaned_value = ' '.join(cleaned_value.split())
+        Returns:
+        - PipelineRunner: The pipeline runner.
+        """
+        if self.pipeline is None:
+            self.pipeline = PipelineRunner(self.cache_directory, enabled=self.config.get("pipeline_cache", True))
+
+        for name, (file_name, file_format) in SOURCE_FILES.items():
+            target_file_path = os.path.join(self.data_directory, file_name)
+            self.pipeline.add_stage(
+                name,
+                functools.partial(self.prepare_data, target_file_path, file_format),
+                files=[target_file_path],
+                config={"format": file_format, "json_batch_size": self.config.get("json_batch_size", DEFAULT_BATCH_SIZE)},
+                version="2",
+            )
+
+        self.pipeline.add_stage(
+            "integrity", self.apply_integrity_checks, inputs=["schedule", "fleet", "airports"],
+            config={"policy": self.config.get("integrity_policy", "drop")}, version="1",
+        )
+        self.pipeline.add_stage("distances", self.compute_checked_distances, inputs=["integrity", "airports"], version="2")
+        return self.pipeline
 
-        # Remove characters that are not letters, numbers, or spaces
-        cleaned_value = re.sub('[^A-Za-z0-9\s]+', '', cleaned_value)
+    def apply_integrity_checks(self, schedule, fleet, airports):
+        """
+        Check the schedule's registrations and airport codes against the fleet and airports data.
+
+        Parameters:
+        - schedule (pd.DataFrame): The schedule data.
+        - fleet (pd.DataFrame): The fleet data.
+        - airports (pd.DataFrame): The airports data.
 
-        # Attempt to convert to datetime
+        Returns:
+        - tuple: The schedule after applying the configured integrity policy, and the orphan report.
+
+        Raises:
+        - IntegrityError: If the policy is 'fail' and orphan legs exist. The orphan report is written first.
+        """
         try:
-            cleaned_value = pd.to_datetime(cleaned_value, errors='raise')
-        except (ValueError, TypeError):
-            pass  # Ignore if not convertible to datetime
+            return check_integrity(schedule, fleet, airports, self.config.get("integrity_policy", "drop"))
+        except IntegrityError as e:
+            self.integrity_report = e.report
+            report_path = self.write_integrity_report()
+            raise IntegrityError(f"{str(e)} See {report_path}", e.report) from None
+
+    def compute_checked_distances(self, checked, airports):
+        """
+        Compute distances for the schedule produced by the integrity stage.
+
+        Parameters:
+        - checked (tuple): The checked schedule and its orphan report.
+        - airports (pd.DataFrame): The airports data.
+
+        Returns:
+        - pd.DataFrame: The schedule with distances in nautical miles.
+        """
+        schedule, _ = checked
+        return self.compute_distances(schedule, airports)
+
+    def write_integrity_report(self):
+        """
+        Write the orphan report of the last integrity check to 'orphan_report.json' in the result directory.
+
+        Returns:
+        - str: The path of the report file.
+        """
+        result_directory = self.config.get("result_directory", os.path.join(os.path.dirname(self.data_directory), "Result"))
+        os.makedirs(result_directory, exist_ok=True)
+        report_path = os.path.join(result_directory, "orphan_report.json")
+        with open(report_path, "w") as f:
+            json.dump(self.integrity_report, f, indent=2)
+        return report_path
 
-        return cleaned_value
-    
     def get_data(self):
         """
-        Get flight data by loading schedule, airports, and fleet data.
+        Get flight data by downloading schedule, airports, and fleet data and running the ingestion pipeline.
+
+        Stages whose inputs are unchanged since the last run are loaded from the pipeline cache.
         """
-        # Load schedule data
-        self.schedule = self.load_data("schedule.json", os.path.join(self.data_directory, "schedule.json"), 'json')
-        self.perform_data_quality_checks(self.schedule)
+        self.download_sources(SOURCE_FILES)
+        self.build_pipeline()
+        self.run_pipeline()
 
-        # Load airports data
-        self.airports = self.load_data("airports.csv", os.path.join(self.data_directory, "airports.csv"), 'csv')
-        self.perform_data_quality_checks(self.airports)
+    def download_sources(self, names, exit_on_error=True):
+        """
+        Download the given source files from blob storage into the data directory.
 
-        # Load fleet data
-        self.fleet = self.load_data("fleet.csv", os.path.join(self.data_directory, "fleet.csv"), 'csv')
-        self.perform_data_quality_checks(self.fleet)
+        Parameters:
+        - names (iterable): Source names, i.e. keys of SOURCE_FILES.
+        - exit_on_error (bool): Whether to exit on a failed download; otherwise the error is raised.
+        """
+        for name in names:
+            file_name, _ = SOURCE_FILES[name]
+            self.download_blob(file_name, os.path.join(self.data_directory, file_name), exit_on_error)
 
-        if self.schedule is not None and self.airports is not None:
-            self.calculate_distances()
+    def source_fingerprint(self, name, source="blob"):
+        """
+        Return a value that changes whenever a source file changes.
+
+        Parameters:
+        - name (str): The source name, i.e. a key of SOURCE_FILES.
+        - source (str): 'blob' to use the blob's ETag, or 'local' to use the digest of the local file.
+
+        Returns:
+        - str: The ETag or content digest.
+        """
+        file_name, _ = SOURCE_FILES[name]
+        if source == "local":
+            return self.pipeline.file_digest(os.path.join(self.data_directory, file_name))
+
+        connection_string = self.config["azure_storage"]["connection_string"]
+        container_name = self.config["azure_storage"]["container_name"]
+        blob = BlobClient.from_connection_string(conn_str=connection_string, container_name=container_name, blob_name=file_name)
+        return blob.get_blob_properties().etag
+
+    def refresh_data(self, changed, download=True):
+        """
+        Reload changed sources and recompute only the pipeline stages that depend on them.
+
+        Stages downstream of a change are re-checked, but served from the cache when their inputs are unchanged
+        by content, e.g. a fleet change that keeps the same legs leaves the distances cached.
+
+        Parameters:
+        - changed (iterable): The names of the changed sources.
+        - download (bool): Whether to download the changed sources from blob storage first.
+
+        Returns:
+        - set: The invalidated pipeline stages.
+
+        Raises:
+        - Exception: If a download or pipeline stage fails. The data loaded before the refresh is kept.
+        """
+        previous = (self.schedule, self.fleet, self.airports, self.integrity_report)
+        try:
+            if download:
+                self.download_sources(changed, exit_on_error=False)
+
+            invalidated = self.pipeline.invalidate_downstream(changed)
+            self.run_pipeline()
+            unreadable = [name for name in SOURCE_FILES if getattr(self, name) is None]
+            if unreadable:
+                raise ValueError(f"Could not load source data: {', '.join(unreadable)}")
+        except Exception:
+            self.schedule, self.fleet, self.airports, self.integrity_report = previous
+            raise
+        return invalidated
+
+    def run_pipeline(self):
+        """
+        Run the ingestion stages and update the schedule, airports and fleet data.
+        """
+        pipeline = self.pipeline
+        self.airports = pipeline.run("airports")
+        self.fleet = pipeline.run("fleet")
+        self.schedule = pipeline.run("schedule")
+        if self.schedule is not None and self.airports is not None and self.fleet is not None:
+            _, self.integrity_report = pipeline.run("integrity")
+            self.schedule = pipeline.run("distances")
+            report_path = self.write_integrity_report()
+            if self.integrity_report["orphan_legs"]:
+                print(f"{self.integrity_report['orphan_legs']} orphan legs found ({self.integrity_report['policy']}); see {report_path}")
 
         logging.info("The Blob files downloaded successfully, and data quality checks passed.")
         print(f"The Blob files downloaded successfully!!..")
 
+    def publish_shared(self, name, extra_frames=None, index_columns=None):
+        """
+        Publish the enriched datasets to shared memory for worker processes.
+
+        Parameters:
+        - name (str): The name of the shared memory segment.
+        - extra_frames (dict): Further DataFrames derived from the datasets (e.g. the lookup index), keyed by name.
+        - index_columns (dict): The column to index each extra DataFrame by when attached, keyed by name.
+
+        Returns:
+        - shared_memory.SharedMemory: The published segment; it stays available until closed and unlinked.
+        """
+        frames = {"distances": self.schedule, "fleet": self.fleet, "airports": self.airports}
+        digests = {stage: self.pipeline.digests.get(stage) for stage in frames}
+        return publish_frames(name, {**frames, **(extra_frames or {})}, digests, index_columns)
+
+    def attach_shared(self, name):
+        """
+        Use datasets published to shared memory instead of downloading and processing the source files.
+
+        The attached DataFrames are read-only views of the shared segment, and the pipeline is seeded with
+        them so that downstream stages keep using the publisher's cache keys.
+
+        Parameters:
+        - name (str): The name of the shared memory segment.
+        """
+        frames, digests, self.shared_memory = attach_frames(name)
+        pipeline = self.build_pipeline()
+        for stage, digest in digests.items():
+            pipeline.seed(stage, frames[stage], digest)
+
+        self.shared_frames = frames
+        self.schedule, self.fleet, self.airports = frames["distances"], frames["fleet"], frames["airports"]
+        logging.info(f"Attached to shared dataset {name}.")
+
 if __name__ == "__main__":
     # Load configuration
     config = FlightDataProcessor.load_config()
@@ -0,0 +1,92 @@
+# Script Name: integrity.py
+# Description: This module checks the referential integrity of the schedule against the fleet and airports data.
+#              Valid registrations and airport codes are collected into hash-based indexes and every foreign key
+#              in the schedule is checked in one vectorized pass. Orphan legs are reported with counts and examples
+#              and then dropped, kept with null reference data, or rejected, depending on the configured policy.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import logging
+
+import pandas as pd
+
+INTEGRITY_POLICIES = ("drop", "keep", "fail")
+
+# Schedule column -> (reference dataset, reference column)
+FOREIGN_KEYS = {
+    "aircraft_registration": ("fleet", "Reg"),
+    "departure_airport": ("airports", "Airport"),
+    "arrival_airport": ("airports", "Airport"),
+}
+
+
+class IntegrityError(ValueError):
+    """
+    IntegrityError is raised by the 'fail' policy and carries the orphan report.
+    """
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def check_integrity(schedule, fleet, airports, policy="drop", max_examples=5):
+    """
+    Check every foreign key of the schedule and apply the integrity policy to orphan legs.
+
+    Parameters:
+    - schedule (pd.DataFrame): The schedule data.
+    - fleet (pd.DataFrame): The fleet data.
+    - airports (pd.DataFrame): The airports data.
+    - policy (str): 'drop' removes orphan legs, 'keep' keeps them (their fleet/airport data will be null),
+      and 'fail' raises a ValueError if any orphan is found.
+    - max_examples (int): The maximum number of distinct orphan values reported per key.
+
+    Returns:
+    - tuple: The schedule after applying the policy, and the orphan report dictionary.
+
+    Raises:
+    - ValueError: If the policy is unsupported.
+    - IntegrityError: If the policy is 'fail' and orphan legs exist; its report attribute holds the orphan report.
+    """
+    if policy not in INTEGRITY_POLICIES:
+        raise ValueError(f"Unsupported integrity policy: {policy}. Supported policies are {', '.join(INTEGRITY_POLICIES)}.")
+
+    references = {"fleet": fleet, "airports": airports}
+    valid_keys = {}
+    orphan_mask = pd.Series(False, index=schedule.index)
+    checks = {}
+
+    for column, (dataset, reference_column) in FOREIGN_KEYS.items():
+        if (dataset, reference_column) not in valid_keys:
+            valid_keys[(dataset, reference_column)] = pd.Index(references[dataset][reference_column].dropna().unique())
+
+        missing = ~schedule[column].isin(valid_keys[(dataset, reference_column)])
+        orphan_mask |= missing
+        orphan_values = schedule.loc[missing, column]
+        checks[column] = {
+            "references": f"{dataset}.{reference_column}",
+            "orphans": int(missing.sum()),
+            "examples": [str(value) for value in orphan_values.drop_duplicates().head(max_examples)],
+        }
+
+    orphan_flights = schedule.loc[orphan_mask, "flight_number"] if "flight_number" in schedule else pd.Series(dtype=object)
+    report = {
+        "policy": policy,
+        "total_legs": int(len(schedule)),
+        "orphan_legs": int(orphan_mask.sum()),
+        "checks": checks,
+        "example_flights": [str(value) for value in orphan_flights.drop_duplicates().head(max_examples)],
+    }
+
+    if report["orphan_legs"]:
+        logging.warning(f"Referential integrity: {report['orphan_legs']} of {report['total_legs']} legs are orphans ({policy}).")
+    else:
+        logging.info("Referential integrity checks passed successfully.")
+
+    if policy == "fail" and report["orphan_legs"]:
+        raise IntegrityError(f"Referential integrity check failed: {report['orphan_legs']} orphan legs found.", report)
+
+    if policy == "drop" and report["orphan_legs"]:
+        schedule = schedule.loc[~orphan_mask].reset_index(drop=True)
+
+    return schedule, report
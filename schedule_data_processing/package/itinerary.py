@@ -0,0 +1,215 @@
+# Script Name: itinerary.py
+# Description: This module searches the merged schedule for itineraries between two airports with up to two stops.
+#              Legs are held in a time-expanded connection index sorted by departure airport and departure time, so
+#              the feasible onward legs of any arrival (within the minimum and maximum connect times) form one
+#              contiguous range found with numpy searchsorted. Whole frontiers of partial itineraries are extended
+#              at once, and results carry the total distance from the distance stage and the seat capacity from
+#              the fleet.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+MIN_CONNECT_MINUTES = 45
+MAX_CONNECT_MINUTES = 180
+MAX_STOPS = 2
+
+# Airport codes are packed above the departure minute into a single sortable key
+AIRPORT_SHIFT = np.int64(1) << 32
+
+
+def to_minutes(values):
+    """
+    Convert datetime values into integer minutes since the epoch.
+
+    Parameters:
+    - values (pd.Series): The datetime values.
+
+    Returns:
+    - np.ndarray: The minutes as int64.
+    """
+    return pd.to_datetime(values).to_numpy().astype("datetime64[m]").astype(np.int64)
+
+
+def expand_ranges(starts, stops):
+    """
+    Expand [start, stop) ranges into the positions they cover, with the index of the range each one came from.
+
+    Parameters:
+    - starts (np.ndarray): The range starts.
+    - stops (np.ndarray): The range stops.
+
+    Returns:
+    - tuple: The index of the source range and the covered position, for every covered position.
+    """
+    counts = stops - starts
+    owners = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, starts[owners] + offsets
+
+
+class ConnectionIndex:
+    """
+    ConnectionIndex holds every leg of the schedule sorted by departure airport and departure time.
+    """
+    def __init__(self, schedule, fleet):
+        """
+        Constructor for ConnectionIndex.
+
+        Parameters:
+        - schedule (pd.DataFrame): The schedule data with distances.
+        - fleet (pd.DataFrame): The fleet data, used for the seat capacity of each leg.
+        """
+        codes, airports = pd.factorize(pd.concat([schedule["departure_airport"], schedule["arrival_airport"]]))
+        departure_code, arrival_code = np.split(codes.astype(np.int64), 2)
+        departure_minute = to_minutes(schedule["scheduled_departure_time"])
+
+        keys = departure_code * AIRPORT_SHIFT + departure_minute
+        order = np.argsort(keys, kind="stable")
+        seats = schedule["aircraft_registration"].map(fleet.drop_duplicates("Reg").set_index("Reg")["Total"])
+
+        self.airports = {str(airport): code for code, airport in enumerate(airports)}
+        self.keys = keys[order]
+        self.departure_airport = departure_code[order]
+        self.arrival_airport = arrival_code[order]
+        self.departure_minute = departure_minute[order]
+        self.arrival_minute = to_minutes(schedule["scheduled_arrival_time"])[order]
+        self.distance = pd.to_numeric(schedule["distance_nm"], errors="coerce").to_numpy(dtype=float)[order]
+        self.seats = pd.to_numeric(seats, errors="coerce").to_numpy(dtype=float)[order]
+        self.flight_number = schedule["flight_number"].astype(str).to_numpy()[order]
+        self.registration = schedule["aircraft_registration"].astype(str).to_numpy()[order]
+        self.airport_names = np.array([str(airport) for airport in airports], dtype=object)
+        logging.info(f"Built connection index of {len(self.keys)} legs at {len(self.airports)} airports.")
+
+    def departures(self, airports, earliest, latest):
+        """
+        Find the legs departing each given airport within a time window.
+
+        Parameters:
+        - airports (np.ndarray): The airport codes.
+        - earliest (np.ndarray): The earliest departure minute for each airport, inclusive.
+        - latest (np.ndarray): The latest departure minute for each airport, inclusive.
+
+        Returns:
+        - tuple: The start and stop positions of the matching legs for each airport.
+        """
+        base = airports * AIRPORT_SHIFT
+        return (
+            np.searchsorted(self.keys, base + earliest, side="left"),
+            np.searchsorted(self.keys, base + latest, side="right"),
+        )
+
+    def search(self, origin, destination, depart_after=None, depart_before=None, max_stops=MAX_STOPS,
+               min_connect=MIN_CONNECT_MINUTES, max_connect=MAX_CONNECT_MINUTES, limit=10):
+        """
+        Search itineraries from origin to destination, earliest arrival first.
+
+        Parameters:
+        - origin (str): The origin airport code.
+        - destination (str): The destination airport code.
+        - depart_after (str or pd.Timestamp): The earliest departure of the first leg. Defaults to any time.
+        - depart_before (str or pd.Timestamp): The latest departure of the first leg. Defaults to any time.
+        - max_stops (int): The maximum number of intermediate stops (0, 1 or 2).
+        - min_connect (int): The minimum connection time in minutes.
+        - max_connect (int): The maximum connection time in minutes.
+        - limit (int): The maximum number of itineraries returned; None returns all of them.
+
+        Returns:
+        - list: The itineraries as dictionaries, sorted by arrival time, then by stops and departure time.
+
+        Raises:
+        - ValueError: If the parameters are invalid.
+        """
+        if not 0 <= max_stops <= MAX_STOPS:
+            raise ValueError(f"max_stops must be between 0 and {MAX_STOPS}.")
+        if not 0 <= min_connect <= max_connect:
+            raise ValueError("Connection times must satisfy 0 <= min_connect <= max_connect.")
+        if origin == destination:
+            raise ValueError("Origin and destination must differ.")
+        if origin not in self.airports or destination not in self.airports:
+            return []
+
+        origin_code, destination_code = self.airports[origin], self.airports[destination]
+        earliest = to_minutes(pd.Series([depart_after]))[0] if depart_after is not None else 0
+        latest = to_minutes(pd.Series([depart_before]))[0] if depart_before is not None else AIRPORT_SHIFT - 1
+
+        start, stop = self.departures(np.array([origin_code]), np.array([earliest]), np.array([latest]))
+        paths = np.arange(start[0], stop[0])[:, np.newaxis]
+        found = []
+        for stops in range(max_stops + 1):
+            last = paths[:, -1]
+            arrived = self.arrival_airport[last] == destination_code
+            found.append(paths[arrived])
+            if stops == max_stops:
+                break
+
+            paths = paths[~arrived]
+            last = paths[:, -1]
+            hub = self.arrival_airport[last]
+            start, stop = self.departures(
+                hub, self.arrival_minute[last] + min_connect, self.arrival_minute[last] + max_connect
+            )
+            owners, onward = expand_ranges(start, stop)
+            paths = np.column_stack([paths[owners], onward])
+
+            # Never pass through the origin or an airport already visited
+            revisited = np.zeros(len(paths), dtype=bool)
+            for column in range(paths.shape[1] - 1):
+                revisited |= self.departure_airport[paths[:, column]] == self.arrival_airport[onward]
+            paths = paths[~revisited]
+
+        # Rank all itineraries on the arrays and only describe the ones returned
+        group = np.concatenate([np.full(len(paths), stops) for stops, paths in enumerate(found)])
+        row = np.concatenate([np.arange(len(paths)) for paths in found])
+        arrival = np.concatenate([self.arrival_minute[paths[:, -1]] for paths in found])
+        departure = np.concatenate([self.departure_minute[paths[:, 0]] for paths in found])
+        ranked = np.lexsort((departure, group, arrival))[:limit]
+
+        logging.info(f"Found {len(group)} itineraries from {origin} to {destination}.")
+        return [self.describe(found[group[position]][row[position]]) for position in ranked]
+
+    def describe(self, legs):
+        """
+        Build the itinerary dictionary for a sequence of legs.
+
+        Parameters:
+        - legs (np.ndarray): The leg positions in the index, in travel order.
+
+        Returns:
+        - dict: The itinerary.
+        """
+        def timestamp(minutes):
+            return str(pd.Timestamp(int(minutes), unit="m"))
+
+        departure = self.departure_minute[legs[0]]
+        arrival = self.arrival_minute[legs[-1]]
+        # NaN propagates, so a leg with an unknown distance or aircraft leaves the total unknown
+        distance = self.distance[legs].sum()
+        seats = self.seats[legs].min()
+
+        return {
+            "departure": timestamp(departure),
+            "arrival": timestamp(arrival),
+            "stops": len(legs) - 1,
+            "via": [str(self.airport_names[code]) for code in self.arrival_airport[legs[:-1]]],
+            "duration_minutes": int(arrival - departure),
+            "connection_minutes": [
+                int(minutes) for minutes in self.departure_minute[legs[1:]] - self.arrival_minute[legs[:-1]]
+            ],
+            "total_distance_nm": None if np.isnan(distance) else round(float(distance), 3),
+            "seats": None if np.isnan(seats) else int(seats),
+            "legs": [
+                {
+                    "flight_number": self.flight_number[leg],
+                    "aircraft_registration": self.registration[leg],
+                    "departure_airport": str(self.airport_names[self.departure_airport[leg]]),
+                    "arrival_airport": str(self.airport_names[self.arrival_airport[leg]]),
+                    "scheduled_departure_time": timestamp(self.departure_minute[leg]),
+                    "scheduled_arrival_time": timestamp(self.arrival_minute[leg]),
+                }
+                for leg in legs
+            ],
+        }
@@ -0,0 +1,304 @@
+# Script Name: json_stream.py
+# Description: This module provides a streaming reader for large JSON record files such as schedule.json.
+#              Records are parsed incrementally from either a JSON array or newline-delimited JSON, buffered
+#              into typed columns in fixed-size batches and assembled into a Pandas DataFrame identical to the
+#              one produced by pd.read_json. Gzip and zstd compressed files are decoded on the fly.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import io
+import gzip
+import json
+import logging
+import warnings
+import importlib
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Mirrors the defaults pd.read_json uses when converting epoch values in date-like columns
+STAMP_UNITS = ("s", "ms", "us", "ns")
+MIN_STAMP = 31536000
+
+
+class BatchTypeMismatch(Exception):
+    """
+    Raised when a batch infers a different date conversion than the batches before it.
+    """
+
+
+def open_text_stream(file_path):
+    """
+    Open a file for text reading, transparently decoding gzip or zstd compression.
+
+    Parameters:
+    - file_path (str): The path of the file to open.
+
+    Returns:
+    - io.TextIOBase: A text stream over the decoded content.
+    """
+    with open(file_path, "rb") as f:
+        magic = f.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(file_path, "rt", encoding="utf-8")
+
+    if magic == ZSTD_MAGIC:
+        try:
+            zstandard = importlib.import_module("zstandard")
+        except ImportError:
+            raise ImportError(f"{file_path} is zstd compressed; install the 'zstandard' package to read it.")
+        raw = open(file_path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+
+    return open(file_path, "r", encoding="utf-8")
+
+
+def iter_json_records(text_stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Incrementally parse JSON objects from a JSON array or newline-delimited JSON stream.
+
+    Parameters:
+    - text_stream (io.TextIOBase): The text stream to parse.
+    - chunk_size (int): The number of characters to read at a time.
+
+    Yields:
+    - dict: The next record in the stream.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    in_array = None
+
+    while True:
+        # Skip whitespace and record separators
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+
+        if position >= len(buffer) - 1 and not eof:
+            # Keep a one-character lookahead so that array/record boundaries are always visible
+            chunk = text_stream.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        if position >= len(buffer):
+            break
+
+        if in_array is None:
+            in_array = buffer[position] == "["
+            if in_array:
+                position += 1
+                continue
+
+        if in_array and buffer[position] == "]":
+            break
+
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The record straddles the end of the buffer; read more and retry
+            chunk = text_stream.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected a JSON object per record, got {type(record).__name__}.")
+
+        yield record
+        position = end
+
+
+def is_date_column(column):
+    """
+    Return True if pd.read_json would attempt to parse the column as dates.
+
+    Parameters:
+    - column: The column name.
+
+    Returns:
+    - bool: Whether the column is treated as a date column.
+    """
+    if not isinstance(column, str):
+        return False
+
+    column_lower = column.lower()
+    return (
+        column_lower.endswith(("_at", "_time"))
+        or column_lower in ("modified", "date", "datetime")
+        or column_lower.startswith("timestamp")
+    )
+
+
+def convert_date_batch(values):
+    """
+    Convert one batch of a date-like column the way pd.read_json does.
+
+    Parameters:
+    - values (pd.Series): The raw batch values.
+
+    Returns:
+    - tuple: The converted series and a signature describing the conversion, or (values, None)
+      if the batch cannot be converted.
+    """
+    if not len(values):
+        return values, None
+
+    new_values = values
+    int_coerced = False
+    if new_values.dtype == "object":
+        try:
+            new_values = values.astype("int64")
+            int_coerced = True
+        except OverflowError:
+            return values, None
+        except (TypeError, ValueError):
+            pass
+
+    if issubclass(new_values.dtype.type, np.number):
+        in_range = new_values.isna() | (new_values > MIN_STAMP)
+        if not in_range.all():
+            return values, None
+
+    for unit in STAMP_UNITS:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", FutureWarning)
+                return pd.to_datetime(new_values, errors="raise", unit=unit), (int_coerced, unit)
+        except (ValueError, OverflowError, TypeError):
+            continue
+
+    return values, None
+
+
+def convert_column_types(values):
+    """
+    Apply the numeric dtype coercion pd.read_json performs on every column.
+
+    Parameters:
+    - values (pd.Series): The assembled column.
+
+    Returns:
+    - pd.Series: The column with numeric strings and integral floats coerced.
+    """
+    if values.dtype == "object":
+        try:
+            values = values.astype("float64")
+        except (TypeError, ValueError):
+            pass
+
+    if values.dtype.kind == "f" and values.dtype != "float64":
+        values = values.astype("float64")
+
+    if len(values) and values.dtype in ("float", "object"):
+        try:
+            int_values = values.astype("int64")
+            if (int_values == values).all():
+                values = int_values
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    if values.dtype.kind in "iu" and values.dtype != "int64":
+        values = values.astype("int64")
+
+    return values
+
+
+def read_json_stream(file_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Read a JSON array or NDJSON file of records into a DataFrame without loading the whole file.
+
+    Records are buffered per column in batches of batch_size, and each batch is converted into typed
+    arrays before the next one is parsed. The result matches pd.read_json on the same content; if a
+    batch would infer a date conversion inconsistent with earlier batches, the file is re-read with
+    pd.read_json so that the output is still identical.
+
+    Parameters:
+    - file_path (str): The path of the (optionally gzip/zstd compressed) JSON file.
+    - batch_size (int): The number of records to buffer before converting them into typed arrays.
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+    """
+    columns = {}
+    date_signatures = {}
+    row_count = 0
+
+    def flush(buffers, length):
+        for column, raw_values in buffers.items():
+            values = pd.Series(raw_values, dtype=None if raw_values else object)
+            if is_date_column(column):
+                values, signature = convert_date_batch(values)
+                if date_signatures.setdefault(column, signature) != signature:
+                    raise BatchTypeMismatch(column)
+            columns.setdefault(column, [])
+            # Columns first seen in this batch are back-filled for the rows already read
+            if not columns[column] and row_count:
+                columns[column].append(pd.Series([None] * row_count, dtype=object))
+            columns[column].append(values)
+
+        for column, batches in columns.items():
+            if column not in buffers:
+                columns[column].append(pd.Series([None] * length, dtype=object))
+
+    try:
+        with open_text_stream(file_path) as text_stream:
+            buffers = {}
+            length = 0
+            for record in iter_json_records(text_stream):
+                for column in record:
+                    if column not in buffers:
+                        buffers[column] = [None] * length
+                for column, column_buffer in buffers.items():
+                    column_buffer.append(record.get(column))
+                length += 1
+
+                if length >= batch_size:
+                    flush(buffers, length)
+                    row_count += length
+                    buffers = {column: [] for column in buffers}
+                    length = 0
+
+            if length or not columns:
+                flush(buffers, length)
+                row_count += length
+
+    except BatchTypeMismatch as e:
+        logging.warning(f"Column '{e}' changed type between batches; falling back to pd.read_json for {file_path}.")
+        with open_text_stream(file_path) as text_stream:
+            return pd.read_json(text_stream, lines=not _is_json_array(file_path))
+
+    frame = {}
+    for column, batches in columns.items():
+        batches = [batch for batch in batches if len(batch)]
+        values = pd.concat(batches, ignore_index=True) if batches else pd.Series([], dtype=object)
+        frame[column] = convert_column_types(values)
+
+    logging.info(f"Streamed {row_count} records from {file_path}.")
+    return pd.DataFrame(frame, index=pd.RangeIndex(row_count))
+
+
+def _is_json_array(file_path):
+    """
+    Return True if the file holds a JSON array rather than newline-delimited JSON.
+    """
+    with open_text_stream(file_path) as text_stream:
+        while True:
+            character = text_stream.read(1)
+            if not character or not character.isspace():
+                return character == "["
@@ -0,0 +1,191 @@
+# Script Name: log_config.py
+# Description: This module configures application logging. Records are handed to a QueueHandler so that callers
+#              never wait on file I/O, and a QueueListener thread writes them as structured JSON (or plain text)
+#              to a size- or time-rotated log file. Third-party loggers such as the Azure SDK HTTP policy are kept
+#              at WARNING by default so request/response headers no longer flood the log.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+DEFAULT_SETTINGS = {
+    "level": "INFO",
+    "format": "json",
+    "file_name": "data_log.txt",
+    "rotation": "size",
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    "when": "midnight",
+    "levels": {
+        "azure": "WARNING",
+        "azure.core.pipeline.policies.http_logging_policy": "WARNING",
+        "urllib3": "WARNING",
+        "geopy": "WARNING",
+    },
+}
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through 'extra' and is emitted as a field
+RESERVED_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    JsonFormatter renders each log record as a single JSON object per line.
+    """
+    def format(self, record):
+        """
+        Format a log record as JSON.
+
+        Parameters:
+        - record (logging.LogRecord): The record to format.
+
+        Returns:
+        - str: The JSON encoded record.
+        """
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+
+        return json.dumps(entry, default=str)
+
+
+def log_file_name(file_name, per_process=False):
+    """
+    Return the log file name, made unique to this process if requested.
+
+    Rotating handlers in several processes must never share a file, because each rollover renames the file
+    under the others and records are lost.
+
+    Parameters:
+    - file_name (str): The configured log file name.
+    - per_process (bool): Whether to add the process ID to the name.
+
+    Returns:
+    - str: The log file name, e.g. 'data_log.4242.txt' per process.
+    """
+    if not per_process:
+        return file_name
+
+    root, extension = os.path.splitext(file_name)
+    return f"{root}.{os.getpid()}{extension}"
+
+
+def build_file_handler(log_filepath, settings):
+    """
+    Create the rotating file handler used by the queue listener.
+
+    Parameters:
+    - log_filepath (str): The path of the active log file.
+    - settings (dict): The logging settings.
+
+    Returns:
+    - logging.Handler: The configured handler.
+    """
+    if settings["rotation"] == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_filepath, when=settings["when"], backupCount=settings["backup_count"], delay=True
+        )
+    elif settings["rotation"] == "size":
+        handler = logging.handlers.RotatingFileHandler(
+            log_filepath, maxBytes=settings["max_bytes"], backupCount=settings["backup_count"], delay=True
+        )
+    else:
+        raise ValueError(f"Unsupported log rotation: {settings['rotation']}. Supported values are 'size' and 'time'.")
+
+    if settings["format"] == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The standard handler formats each record on the calling thread; here only the message arguments are
+    merged and any traceback is rendered to exc_text, which both the JSON and text formatters emit.
+    """
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_directory, settings=None, per_process=False):
+    """
+    Route all logging through a background queue listener writing to a rotating log file.
+
+    Calling this more than once is a no-op, so every component may request logging safely.
+
+    Parameters:
+    - log_directory (str): The directory holding the log files.
+    - settings (dict): Overrides for DEFAULT_SETTINGS, e.g. the 'logging' section of config.json.
+    - per_process (bool): Write to a log file of this process's own, for processes running alongside
+      another writer of the same log directory (e.g. shared dataset workers).
+
+    Returns:
+    - str: The path of the active log file.
+    """
+    global _listener
+
+    overrides = settings or {}
+    settings = {**DEFAULT_SETTINGS, **overrides}
+    settings["levels"] = {**DEFAULT_SETTINGS["levels"], **overrides.get("levels", {})}
+    log_filepath = os.path.join(log_directory, log_file_name(settings["file_name"], per_process))
+
+    if _listener is not None:
+        return log_filepath
+
+    os.makedirs(log_directory, exist_ok=True)
+    file_handler = build_file_handler(log_filepath, settings)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(settings["level"])
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    for logger_name, level in settings["levels"].items():
+        logging.getLogger(logger_name).setLevel(level)
+
+    return log_filepath
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
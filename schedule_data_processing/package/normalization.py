@@ -0,0 +1,116 @@
+# Script Name: normalization.py
+# Description: This module provides the text normalization applied by the data quality checks (transliteration,
+#              whitespace collapsing, punctuation removal and datetime parsing). Columns are normalized once per
+#              distinct value and mapped back through factorized codes, high-cardinality columns are spread over
+#              worker processes, and single values go through a bounded LRU cache for streaming use.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import os
+import re
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from unidecode import unidecode
+
+NORMALIZE_CACHE_SIZE = 65536
+PARALLEL_THRESHOLD = 50000
+
+NON_ALPHANUMERIC = re.compile(r'[^A-Za-z0-9\s]+')
+
+
+def normalize_text(text):
+    """
+    Clean non-English characters and format datetime in a string.
+
+    Parameters:
+    - text (str): The string to clean.
+
+    Returns:
+    - The cleaned string, or a pd.Timestamp if it parses as a datetime.
+    """
+    # Convert non-English characters to English equivalents
+    cleaned_value = unidecode(text)
+
+    # Remove extra spaces
+    cleaned_value = ' '.join(cleaned_value.split())
+
+    # Remove characters that are not letters, numbers, or spaces
+    cleaned_value = NON_ALPHANUMERIC.sub('', cleaned_value)
+
+    # Attempt to convert to datetime
+    try:
+        cleaned_value = pd.to_datetime(cleaned_value, errors='raise')
+    except (ValueError, TypeError):
+        pass  # Ignore if not convertible to datetime
+
+    return cleaned_value
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def cached_normalize(text):
+    """
+    Normalize a string through a bounded LRU cache, for callers cleaning values one at a time.
+    """
+    return normalize_text(text)
+
+
+def normalize_strings(texts, workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+    """
+    Normalize distinct strings, in worker processes when there are enough of them to pay for the startup.
+
+    Parameters:
+    - texts (list): The distinct strings.
+    - workers (int): The number of worker processes. Defaults to the number of CPUs.
+    - parallel_threshold (int): The minimum number of strings normalized in parallel.
+
+    Returns:
+    - list: The normalized values, in the same order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(texts) >= parallel_threshold:
+        chunk_size = max(len(texts) // (workers * 4), 1)
+        # Spawned workers do not inherit the parent's threads (e.g. the logging listener) or locks held by them
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            return list(executor.map(normalize_text, texts, chunksize=chunk_size))
+
+    return [cached_normalize(text) for text in texts]
+
+
+def normalize_column(values, workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+    """
+    Normalize every value of a column, cleaning each distinct value only once.
+
+    The result is identical to applying normalize_text(str(value)) to every cell.
+
+    Parameters:
+    - values (pd.Series): The column to normalize.
+    - workers (int): The number of worker processes for high-cardinality columns.
+    - parallel_threshold (int): The minimum number of distinct values normalized in parallel.
+
+    Returns:
+    - pd.Series: The normalized column.
+    """
+    # Missing values are factorized together (None and NaN alike), so their string forms are taken per cell
+    codes, uniques = pd.factorize(values)
+    texts = [str(value) for value in uniques]
+    missing = codes < 0
+    if missing.any():
+        missing_texts = [str(value) for value in values.to_numpy()[missing]]
+        codes = codes.copy()
+        codes[missing] = len(texts) + np.arange(len(missing_texts))
+        texts.extend(missing_texts)
+
+    # Distinct values can still share a string form (e.g. 1 and '1'), so deduplicate on the strings
+    text_codes, distinct_texts = pd.factorize(pd.Series(texts, dtype=object))
+    normalized = normalize_strings(list(distinct_texts), workers, parallel_threshold)
+
+    lookup = np.empty(len(normalized), dtype=object)
+    lookup[:] = normalized
+    cleaned = lookup[text_codes][codes]
+
+    return pd.Series(list(cleaned), index=values.index, name=values.name)
@@ -0,0 +1,309 @@
+# Script Name: pipeline.py
+# Description: This module provides a small DAG runner for the data processing pipeline. Each stage declares
+#              the upstream stages and files it reads, its configuration and a code version. Stage outputs are
+#              cached on disk under a content hash of those inputs, so a re-run only recomputes the stages whose
+#              inputs actually changed.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import os
+import json
+import tempfile
+import contextlib
+import pickle
+import hashlib
+import logging
+
+import pandas as pd
+
+
+def value_digest(value):
+    """
+    Compute a content digest of a stage output that is equal for equal data.
+
+    Pickled bytes are not stable for equal DataFrames (e.g. a frame loaded back from the cache pickles
+    differently), so frames are hashed by their values, index, column names and dtypes, and tuples, lists
+    and dicts part by part. Other values fall back to their pickled bytes.
+
+    Parameters:
+    - value: The stage output.
+
+    Returns:
+    - str: The SHA-256 hex digest.
+    """
+    sha = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        sha.update(type(value).__name__.encode("utf-8"))
+        if isinstance(value, pd.DataFrame):
+            layout = [(str(column), str(dtype)) for column, dtype in value.dtypes.items()]
+        else:
+            layout = [(str(value.name), str(value.dtype))]
+        sha.update(json.dumps(layout).encode("utf-8"))
+        try:
+            sha.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Columns holding unhashable objects such as lists
+            sha.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    elif isinstance(value, (tuple, list)):
+        sha.update(json.dumps([type(value).__name__] + [value_digest(part) for part in value]).encode("utf-8"))
+    elif isinstance(value, dict):
+        parts = {str(key): value_digest(part) for key, part in value.items()}
+        sha.update(json.dumps(["dict", parts], sort_keys=True).encode("utf-8"))
+    else:
+        try:
+            sha.update(json.dumps(value, sort_keys=True).encode("utf-8"))
+        except (TypeError, ValueError):
+            sha.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return sha.hexdigest()
+
+
+class Stage:
+    """
+    A single step of the pipeline.
+    """
+    def __init__(self, name, func, inputs=(), files=(), config=None, version="1", outputs=()):
+        """
+        Constructor for Stage.
+
+        Parameters:
+        - name (str): The unique name of the stage.
+        - func (callable): Computes the stage output; called with the outputs of the input stages, in order.
+        - inputs (list): Names of the upstream stages the stage depends on.
+        - files (list): Paths of the files the stage reads.
+        - config (dict): Configuration values that affect the stage output.
+        - version (str): The code version of the stage; bump it whenever the stage logic changes.
+        - outputs (list): Paths of the files the stage writes. A cache hit requires them to be unchanged.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.files = list(files)
+        self.config = config or {}
+        self.version = version
+        self.outputs = list(outputs)
+
+
+class PipelineRunner:
+    """
+    PipelineRunner resolves stages in dependency order and caches their outputs by content hash.
+    """
+    def __init__(self, cache_directory, enabled=True):
+        """
+        Constructor for PipelineRunner.
+
+        Parameters:
+        - cache_directory (str): The directory holding cached stage outputs.
+        - enabled (bool): If False, every stage is recomputed and nothing is written to the cache.
+        """
+        self.cache_directory = cache_directory
+        self.enabled = enabled
+        self.stages = {}
+        self.results = {}
+        self.digests = {}
+        self.report = []
+        self._file_digests = {}
+
+        if self.enabled:
+            os.makedirs(self.cache_directory, exist_ok=True)
+
+    def add_stage(self, name, func, inputs=(), files=(), config=None, version="1", outputs=()):
+        """
+        Register a stage, replacing any stage with the same name.
+
+        Returns:
+        - Stage: The registered stage.
+        """
+        stage = Stage(name, func, inputs, files, config, version, outputs)
+        self.stages[name] = stage
+        return stage
+
+    def invalidate(self, names=None):
+        """
+        Forget the in-memory results of the given stages, or of all stages, so the next run re-checks them.
+
+        Parameters:
+        - names (list): The stages to invalidate. Defaults to every stage.
+        """
+        for name in (names if names is not None else list(self.results)):
+            self.results.pop(name, None)
+            self.digests.pop(name, None)
+        self._file_digests.clear()
+
+    def invalidate_downstream(self, names):
+        """
+        Invalidate the given stages and every stage that depends on them, directly or indirectly.
+
+        Parameters:
+        - names (iterable): The stages whose inputs changed.
+
+        Returns:
+        - set: The invalidated stage names.
+        """
+        invalidated = set(names)
+        pending = list(invalidated)
+        while pending:
+            name = pending.pop()
+            for stage in self.stages.values():
+                if name in stage.inputs and stage.name not in invalidated:
+                    invalidated.add(stage.name)
+                    pending.append(stage.name)
+
+        self.invalidate(invalidated)
+        return invalidated
+
+    def seed(self, name, value, digest):
+        """
+        Provide the output of a stage computed elsewhere, e.g. by a process that published it to shared memory.
+
+        Parameters:
+        - name (str): The name of the stage.
+        - value: The stage output.
+        - digest (str): The content digest of the output, used to key downstream stages.
+        """
+        self.results[name] = value
+        self.digests[name] = digest
+        self.report.append((name, "seed", digest))
+
+    def file_digest(self, file_path):
+        """
+        Compute the SHA-256 digest of a file, reusing the last digest while its size and mtime are unchanged.
+        """
+        if not os.path.exists(file_path):
+            return None
+
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._file_digests.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        self._file_digests[file_path] = (signature, digest)
+        return digest
+
+    def stage_key(self, stage):
+        """
+        Compute the content hash identifying a stage's output.
+
+        The key covers the stage name and version, its configuration, the content of the files it reads
+        and the content digests of its upstream outputs.
+        """
+        payload = {
+            "name": stage.name,
+            "version": stage.version,
+            "config": stage.config,
+            "files": {path: self.file_digest(path) for path in stage.files},
+            "inputs": {name: self.digests[name] for name in stage.inputs},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def run(self, name):
+        """
+        Return the output of a stage, running or loading its dependencies first.
+
+        Parameters:
+        - name (str): The name of the stage.
+
+        Returns:
+        - The stage output.
+        """
+        if name in self.results:
+            return self.results[name]
+
+        if name not in self.stages:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        stage = self.stages[name]
+
+        input_values = [self.run(input_name) for input_name in stage.inputs]
+        key = self.stage_key(stage)
+        cache_path = os.path.join(self.cache_directory, f"{name}-{key}.pkl")
+
+        entry = self.load_entry(cache_path, stage) if self.enabled else None
+        if entry is not None:
+            status = "hit"
+            digest, value = entry["digest"], pickle.loads(entry["value_bytes"])
+        else:
+            status = "miss"
+            value = stage.func(*input_values)
+            if self.enabled:
+                value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                digest = value_digest(value)
+                self.store_entry(cache_path, stage, digest, value_bytes)
+            else:
+                digest = key
+
+        self.results[name] = value
+        self.digests[name] = digest
+        self.report.append((name, status, key))
+        logging.info(f"Pipeline stage {name}: cache {status} ({key[:12]}).")
+        return value
+
+    def load_entry(self, cache_path, stage):
+        """
+        Load a cached stage entry, returning None if it is missing, unreadable or its output files changed.
+        """
+        try:
+            with open(cache_path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            # Not cached yet, or removed by a concurrent writer storing a newer entry
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cache entry {cache_path}: {str(e)}")
+            return None
+
+        for path, digest in entry["outputs"].items():
+            if self.file_digest(path) != digest:
+                return None
+
+        return entry
+
+    def store_entry(self, cache_path, stage, digest, value_bytes):
+        """
+        Write a stage entry atomically and remove the stage's older entries.
+        """
+        entry = {
+            "digest": digest,
+            "outputs": {path: self.file_digest(path) for path in stage.outputs},
+            "value_bytes": value_bytes,
+        }
+        # Each writer gets its own temporary file, as processes sharing the cache may store the same key at once
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_directory, prefix=f".{stage.name}-", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+        prefix = f"{stage.name}-"
+        for file_name in os.listdir(self.cache_directory):
+            file_path = os.path.join(self.cache_directory, file_name)
+            if file_name.startswith(prefix) and file_name.endswith(".pkl") and file_path != cache_path:
+                # Other stage names may share the prefix, so only drop exact '<name>-<sha256>.pkl' entries
+                if len(file_name) == len(prefix) + 64 + len(".pkl"):
+                    # Another process may have removed it already
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(file_path)
+
+    def explain(self):
+        """
+        Describe which stages were served from the cache and which were recomputed.
+
+        Returns:
+        - list: One line per stage run, in execution order.
+        """
+        lines = []
+        width = max((len(name) for name, _, _ in self.report), default=0)
+        for name, status, key in self.report:
+            stage = self.stages[name]
+            inputs = ", ".join(stage.inputs + [os.path.basename(path) for path in stage.files]) or "-"
+            lines.append(f"{name:<{width}} {status:<4} {key[:12]}  inputs: {inputs}")
+        return lines
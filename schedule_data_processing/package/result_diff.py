@@ -0,0 +1,127 @@
+# Script Name: result_diff.py
+# Description: This module compares two merge outputs (e.g. the previous and current Flight_results.csv) keyed by
+#              flight number and departure time. Rows are fingerprinted with a vectorized hash so that only changed
+#              legs are inspected, and the added, removed and modified legs, with column-level changes for the
+#              modified ones, are written as a compact newline-delimited JSON delta file.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import json
+import logging
+
+import pandas as pd
+
+DEFAULT_KEY_COLUMNS = ["flight_number", "scheduled_departure_time"]
+
+
+def read_result(file_path, key_columns):
+    """
+    Read a merge output as text, indexed by its key columns.
+
+    Values are compared as written, so no type inference or float formatting can create spurious changes.
+
+    Parameters:
+    - file_path (str): The path of the merge output CSV.
+    - key_columns (list): The columns identifying a leg.
+
+    Returns:
+    - pd.DataFrame: The result rows indexed by key.
+    """
+    frame = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    missing = [column for column in key_columns if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{file_path} is missing key columns: {', '.join(missing)}")
+
+    duplicated = frame.duplicated(key_columns, keep="last")
+    if duplicated.any():
+        logging.warning(f"{file_path} has {int(duplicated.sum())} duplicate keys; keeping the last row for each.")
+        frame = frame.loc[~duplicated]
+
+    return frame.set_index(key_columns)
+
+
+def row_fingerprints(frame):
+    """
+    Hash every row of a frame into a single 64-bit fingerprint.
+
+    Parameters:
+    - frame (pd.DataFrame): The rows to fingerprint.
+
+    Returns:
+    - pd.Series: The fingerprints, indexed like the frame.
+    """
+    return pd.util.hash_pandas_object(frame, index=False)
+
+
+def diff_results(old, new, key_columns=DEFAULT_KEY_COLUMNS):
+    """
+    Compare two keyed result frames.
+
+    Parameters:
+    - old (pd.DataFrame): The previous result, indexed by key.
+    - new (pd.DataFrame): The current result, indexed by key.
+    - key_columns (list): The names of the key columns.
+
+    Returns:
+    - list: Delta records: {"op": "add", "key", "row"}, {"op": "remove", "key"} or {"op": "modify", "key", "changes"},
+      where changes maps each changed column to its [old, new] values.
+    """
+    columns = list(new.columns) + [column for column in old.columns if column not in new.columns]
+    old = old.reindex(columns=columns, fill_value="")
+    new = new.reindex(columns=columns, fill_value="")
+
+    added = new.index.difference(old.index, sort=False)
+    removed = old.index.difference(new.index, sort=False)
+    common = new.index.intersection(old.index, sort=False)
+
+    old_common, new_common = old.loc[common], new.loc[common]
+    changed = row_fingerprints(old_common).to_numpy() != row_fingerprints(new_common).to_numpy()
+    old_changed, new_changed = old_common.loc[changed], new_common.loc[changed]
+    changed_cells = (old_changed != new_changed).to_numpy()
+
+    def key_of(index_value):
+        values = index_value if isinstance(index_value, tuple) else (index_value,)
+        return dict(zip(key_columns, values))
+
+    delta = []
+    added_rows = new.loc[added]
+    for index_value, row in zip(added_rows.index, added_rows.to_dict(orient="records")):
+        delta.append({"op": "add", "key": key_of(index_value), "row": row})
+
+    for index_value in removed:
+        delta.append({"op": "remove", "key": key_of(index_value)})
+
+    old_values, new_values = old_changed.to_numpy(), new_changed.to_numpy()
+    for position, index_value in enumerate(old_changed.index):
+        changes = {
+            columns[column]: [old_values[position, column], new_values[position, column]]
+            for column in changed_cells[position].nonzero()[0]
+        }
+        delta.append({"op": "modify", "key": key_of(index_value), "changes": changes})
+
+    return delta
+
+
+def diff_files(old_path, new_path, delta_path, key_columns=DEFAULT_KEY_COLUMNS):
+    """
+    Compare two merge output files and write the delta as newline-delimited JSON.
+
+    Parameters:
+    - old_path (str): The previous merge output.
+    - new_path (str): The current merge output.
+    - delta_path (str): The delta file to write.
+    - key_columns (list): The columns identifying a leg.
+
+    Returns:
+    - dict: The number of added, removed and modified legs, and the delta file path.
+    """
+    delta = diff_results(read_result(old_path, key_columns), read_result(new_path, key_columns), key_columns)
+
+    with open(delta_path, "w") as f:
+        for record in delta:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    summary = {op: sum(1 for record in delta if record["op"] == op) for op in ("add", "remove", "modify")}
+    summary["delta"] = delta_path
+    logging.info(f"Result diff {old_path} -> {new_path}: {summary}")
+    return summary
@@ -0,0 +1,141 @@
+# Script Name: shared_dataset.py
+# Description: This module publishes the enriched schedule, fleet and airports DataFrames into a single
+#              multiprocessing.shared_memory segment so that worker processes can attach to them read-only
+#              without downloading, parsing or copying the data. Numeric and datetime columns are stored as raw
+#              arrays and all other columns are dictionary encoded as categorical codes.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import pickle
+import struct
+import logging
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+import pandas as pd
+
+ALIGNMENT = 64
+HEADER = struct.Struct("<Q")
+
+
+def _align(offset):
+    """
+    Round an offset up to the next ALIGNMENT boundary.
+    """
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def encode_column(values):
+    """
+    Convert a column into an array that can live in shared memory.
+
+    Parameters:
+    - values (pd.Series): The column to encode.
+
+    Returns:
+    - tuple: The array to store and the categories needed to decode it (None for raw arrays).
+    """
+    if values.dtype.kind in "biufM" and not isinstance(values.dtype, pd.CategoricalDtype):
+        return np.ascontiguousarray(values.to_numpy()), None
+
+    categorical = pd.Categorical(values)
+    return np.ascontiguousarray(categorical.codes), list(categorical.categories)
+
+
+def publish_frames(name, frames, digests=None, index_columns=None):
+    """
+    Copy DataFrames into a new shared memory segment.
+
+    The caller owns the returned segment and must keep a reference to it for as long as workers may attach,
+    then close and unlink it.
+
+    Parameters:
+    - name (str): The name of the shared memory segment.
+    - frames (dict): The DataFrames to publish, keyed by dataset name.
+    - digests (dict): Optional pipeline output digests stored alongside the data, keyed by dataset name.
+    - index_columns (dict): Optional column to index each dataset by when attached, keyed by dataset name.
+
+    Returns:
+    - shared_memory.SharedMemory: The published segment.
+    """
+    manifest = {"frames": {}, "digests": digests or {}}
+    arrays = []
+    offset = 0
+    for frame_name, frame in frames.items():
+        columns = []
+        for column in frame.columns:
+            array, categories = encode_column(frame[column])
+            columns.append({
+                "name": column,
+                "dtype": array.dtype.str,
+                "offset": offset,
+                "categories": categories,
+            })
+            arrays.append((offset, array))
+            offset = _align(offset + array.nbytes)
+        manifest["frames"][frame_name] = {
+            "length": len(frame),
+            "columns": columns,
+            "index": (index_columns or {}).get(frame_name),
+        }
+
+    manifest_bytes = pickle.dumps(manifest, protocol=pickle.HIGHEST_PROTOCOL)
+    data_start = _align(HEADER.size + len(manifest_bytes))
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(data_start + offset, 1))
+    HEADER.pack_into(shm.buf, 0, len(manifest_bytes))
+    shm.buf[HEADER.size:HEADER.size + len(manifest_bytes)] = manifest_bytes
+    for array_offset, array in arrays:
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=data_start + array_offset)
+        target[...] = array
+
+    logging.info(f"Published {len(frames)} datasets ({shm.size} bytes) to shared memory segment {name}.")
+    return shm
+
+
+def attach_frames(name):
+    """
+    Attach read-only, zero-copy DataFrames to a published shared memory segment.
+
+    The returned segment must stay referenced while the DataFrames are in use; closing it invalidates them.
+    Datasets published with an index column are indexed by it, through an index over the shared categorical
+    codes rather than a copy of the data.
+
+    Parameters:
+    - name (str): The name of the shared memory segment.
+
+    Returns:
+    - tuple: The DataFrames keyed by dataset name, the stored digests, and the attached segment.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the resource tracker,
+        # which would unlink it when this worker exits
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    (manifest_length,) = HEADER.unpack_from(shm.buf, 0)
+    manifest = pickle.loads(shm.buf[HEADER.size:HEADER.size + manifest_length])
+    data_start = _align(HEADER.size + manifest_length)
+
+    frames = {}
+    for frame_name, layout in manifest["frames"].items():
+        columns = {}
+        for column in layout["columns"]:
+            array = np.ndarray(
+                (layout["length"],), dtype=np.dtype(column["dtype"]), buffer=shm.buf,
+                offset=data_start + column["offset"],
+            )
+            array.flags.writeable = False
+            if column["categories"] is None:
+                columns[column["name"]] = array
+            else:
+                columns[column["name"]] = pd.Categorical.from_codes(array, column["categories"])
+        index = pd.RangeIndex(layout["length"])
+        if layout.get("index") is not None:
+            index = pd.Index(columns[layout["index"]])
+        frames[frame_name] = pd.DataFrame(columns, index=index, copy=False)
+
+    logging.info(f"Attached to shared memory segment {name} ({shm.size} bytes).")
+    return frames, manifest["digests"], shm
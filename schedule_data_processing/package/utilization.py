@@ -0,0 +1,138 @@
+# Script Name: utilization.py
+# Description: This module computes aircraft utilization analytics from the schedule and fleet data.
+#              Legs are sorted into per-aircraft interval arrays and all metrics (block hours, legs per day,
+#              hub dwell time, rotations) are derived with vectorized groupby/shift/cumsum operations, so the
+#              cost stays linear in the number of legs after the sort.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+REGISTRATION_COLUMNS = [
+    "Reg", "TypeName", "Hub", "legs", "block_hours", "legs_per_day", "block_hours_per_day",
+    "rotations", "hub_turns", "hub_dwell_hours", "avg_hub_dwell_hours", "continuity_breaks",
+]
+
+TYPE_COLUMNS = [
+    "TypeName", "aircraft", "active_aircraft", "legs", "block_hours", "legs_per_day", "block_hours_per_day",
+    "hub_turns", "avg_hub_dwell_hours",
+]
+
+
+def build_leg_intervals(schedule, fleet):
+    """
+    Build the per-aircraft interval table: one row per leg, sorted by registration and departure time.
+
+    Parameters:
+    - schedule (pd.DataFrame): The schedule data.
+    - fleet (pd.DataFrame): The fleet data.
+
+    Returns:
+    - pd.DataFrame: The sorted legs with block time, ground time and hub flags.
+    """
+    legs = pd.DataFrame({
+        "Reg": schedule["aircraft_registration"].to_numpy(),
+        "departure_airport": schedule["departure_airport"].to_numpy(),
+        "arrival_airport": schedule["arrival_airport"].to_numpy(),
+        "departure": pd.to_datetime(schedule["scheduled_departure_time"]).to_numpy(),
+        "arrival": pd.to_datetime(schedule["scheduled_arrival_time"]).to_numpy(),
+    })
+    hubs = fleet.drop_duplicates("Reg").set_index("Reg")["Hub"]
+    legs["Hub"] = legs["Reg"].map(hubs)
+
+    # Sort on integer registration codes rather than strings to keep the one O(n log n) step cheap
+    aircraft_codes, _ = pd.factorize(legs["Reg"])
+    order = np.lexsort((legs["departure"].to_numpy(), aircraft_codes))
+    legs = legs.take(order).reset_index(drop=True)
+    legs["aircraft_code"] = aircraft_codes[order]
+
+    # Compare airports as integer codes from one shared factorization instead of as strings
+    airport_codes, _ = pd.factorize(pd.concat([legs["departure_airport"], legs["arrival_airport"], legs["Hub"]]))
+    departure_code, arrival_code, hub_code = np.split(airport_codes, 3)
+    legs["arrival_code"] = arrival_code
+
+    by_aircraft = legs.groupby("aircraft_code", sort=False)
+    next_departure = by_aircraft["departure"].shift(-1)
+    previous_arrival_code = by_aircraft["arrival_code"].shift(1)
+
+    legs["block_hours"] = (legs["arrival"] - legs["departure"]).dt.total_seconds() / 3600
+    legs["ground_hours"] = (next_departure - legs["arrival"]).dt.total_seconds() / 3600
+
+    # A leg arriving at the aircraft's hub followed by another leg is a hub turn
+    legs["hub_turn"] = (arrival_code == hub_code) & legs["ground_hours"].notna()
+    legs["hub_dwell_hours"] = legs["ground_hours"].where(legs["hub_turn"], 0.0)
+
+    # Every departure from the hub opens a new rotation; the running count numbers them per aircraft
+    legs["rotation"] = pd.Series(departure_code == hub_code, dtype=np.int64).groupby(legs["aircraft_code"]).cumsum()
+
+    legs["continuity_break"] = previous_arrival_code.notna() & (previous_arrival_code != departure_code)
+    return legs
+
+
+def schedule_days(legs):
+    """
+    Return the number of calendar days covered by the schedule (at least one).
+    """
+    if legs.empty:
+        return 1
+    first_day = legs["departure"].min().normalize()
+    last_day = legs["arrival"].max().normalize()
+    return max(int((last_day - first_day).days) + 1, 1)
+
+
+def compute_utilization(schedule, fleet):
+    """
+    Compute per-registration and per-type utilization.
+
+    Every aircraft in the fleet is reported, including those without any legs.
+
+    Parameters:
+    - schedule (pd.DataFrame): The schedule data.
+    - fleet (pd.DataFrame): The fleet data.
+
+    Returns:
+    - tuple: The per-registration and per-type utilization DataFrames.
+    """
+    legs = build_leg_intervals(schedule, fleet)
+    days = schedule_days(legs)
+
+    per_aircraft = legs.groupby("Reg", sort=False, observed=True).agg(
+        legs=("block_hours", "size"),
+        block_hours=("block_hours", "sum"),
+        rotations=("rotation", "max"),
+        hub_turns=("hub_turn", "sum"),
+        hub_dwell_hours=("hub_dwell_hours", "sum"),
+        continuity_breaks=("continuity_break", "sum"),
+    )
+
+    aircraft = fleet.drop_duplicates("Reg")[["Reg", "TypeName", "Hub"]].set_index("Reg")
+    by_registration = aircraft.join(per_aircraft, how="left")
+    counts = ["legs", "rotations", "hub_turns", "continuity_breaks"]
+    by_registration[counts] = by_registration[counts].fillna(0).astype(np.int64)
+    by_registration[["block_hours", "hub_dwell_hours"]] = by_registration[["block_hours", "hub_dwell_hours"]].fillna(0.0)
+
+    by_registration["legs_per_day"] = by_registration["legs"] / days
+    by_registration["block_hours_per_day"] = by_registration["block_hours"] / days
+    by_registration["avg_hub_dwell_hours"] = (
+        by_registration["hub_dwell_hours"] / by_registration["hub_turns"].replace(0, np.nan)
+    )
+    by_registration = by_registration.reset_index()[REGISTRATION_COLUMNS]
+
+    by_type = by_registration.assign(active=by_registration["legs"] > 0).groupby("TypeName", sort=True, observed=True).agg(
+        aircraft=("Reg", "size"),
+        active_aircraft=("active", "sum"),
+        legs=("legs", "sum"),
+        block_hours=("block_hours", "sum"),
+        hub_turns=("hub_turns", "sum"),
+        hub_dwell_hours=("hub_dwell_hours", "sum"),
+    )
+    by_type["legs_per_day"] = by_type["legs"] / (by_type["aircraft"] * days)
+    by_type["block_hours_per_day"] = by_type["block_hours"] / (by_type["aircraft"] * days)
+    by_type["avg_hub_dwell_hours"] = by_type["hub_dwell_hours"] / by_type["hub_turns"].replace(0, np.nan)
+    by_type = by_type.reset_index()[TYPE_COLUMNS]
+
+    logging.info(f"Computed utilization for {len(by_registration)} aircraft over {days} days and {len(legs)} legs.")
+    return by_registration.round(2), by_type.round(2)
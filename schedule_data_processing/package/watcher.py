@@ -0,0 +1,92 @@
+# Script Name: watcher.py
+# Description: This module polls the source data (blob ETags or local file digests) for changes. Changes are
+#              debounced so that a burst of uploads triggers a single refresh, and the poll loop sleeps on an
+#              Event between checks so that it costs next to no CPU while idle.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import time
+import logging
+
+
+class SourceWatcher:
+    """
+    SourceWatcher reports which sources changed since the last refresh.
+    """
+    def __init__(self, sources, fingerprint, interval=30, debounce=5):
+        """
+        Constructor for SourceWatcher.
+
+        Parameters:
+        - sources (list): The names of the sources to watch.
+        - fingerprint (callable): Returns a value identifying the current content of a source, given its name.
+        - interval (float): Seconds between polls while idle.
+        - debounce (float): Seconds the sources must stay unchanged before a change is reported.
+        """
+        self.sources = list(sources)
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.debounce = debounce
+        self.baseline = {}
+        self.baseline = self.snapshot()
+
+    def snapshot(self):
+        """
+        Fingerprint every source, treating a failed check as 'unknown' rather than as a change.
+        """
+        fingerprints = {}
+        for name in self.sources:
+            try:
+                fingerprints[name] = self.fingerprint(name)
+            except Exception as e:
+                logging.warning(f"Could not check source {name}: {str(e)}")
+                fingerprints[name] = self.baseline.get(name)
+        return fingerprints
+
+    def changed_sources(self, fingerprints):
+        """
+        Return the names of the sources whose fingerprint differs from the baseline.
+        """
+        return {name for name in self.sources if fingerprints[name] != self.baseline[name]}
+
+    def retry(self, names):
+        """
+        Report the given sources as changed again on the next poll, e.g. after their refresh failed.
+
+        Parameters:
+        - names (iterable): The names of the sources to retry.
+        """
+        for name in names:
+            self.baseline[name] = None
+
+    def wait_for_changes(self, stop_event):
+        """
+        Block until at least one source has changed and then stayed stable for the debounce period.
+
+        Parameters:
+        - stop_event (threading.Event): Set to stop waiting.
+
+        Returns:
+        - set: The names of the changed sources, or an empty set if stopped.
+        """
+        while not stop_event.wait(self.interval):
+            fingerprints = self.snapshot()
+            if not self.changed_sources(fingerprints):
+                continue
+
+            # Wait for the burst of changes to settle before reporting it
+            settled_at = time.monotonic()
+            while time.monotonic() - settled_at < self.debounce:
+                if stop_event.wait(min(self.interval, self.debounce)):
+                    return set()
+                latest = self.snapshot()
+                if latest != fingerprints:
+                    fingerprints, settled_at = latest, time.monotonic()
+
+            changed = self.changed_sources(fingerprints)
+            self.baseline = fingerprints
+            if changed:
+                logging.info(f"Detected changes in sources: {', '.join(sorted(changed))}")
+                return changed
+
+        return set()
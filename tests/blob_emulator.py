@@ -0,0 +1,226 @@
+# Script Name: blob_emulator.py
+# Description: This module serves in-memory blobs over HTTP with enough of the Azure Blob Storage REST API (ranged
+#              GET, HEAD properties, ETags and error codes) for azure-storage-blob clients to download them. It lets
+#              the load test harness and the unit tests run the full application lifecycle without network access
+#              or credentials, and counts the requests and bytes it serves.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import re
+import time
+import uuid
+import base64
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+ACCOUNT_NAME = "devstoreaccount1"
+ACCOUNT_KEY = base64.b64encode(b"blob-emulator-account-key").decode()
+API_VERSION = "2021-08-06"
+
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class BlobEmulator:
+    """
+    BlobEmulator serves blobs from memory on a local HTTP port, in a background thread.
+    """
+    def __init__(self, container_name, blobs=None, host="127.0.0.1", port=0, latency=0.0):
+        """
+        Constructor for BlobEmulator.
+
+        Parameters:
+        - container_name (str): The name of the emulated container.
+        - blobs (dict): The initial blob contents (bytes), keyed by blob name.
+        - host (str): The interface to listen on.
+        - port (int): The port to listen on; 0 picks a free port.
+        - latency (float): Seconds added to every response, to emulate a remote storage account.
+        """
+        self.container_name = container_name
+        self.latency = latency
+        self.blobs = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        for blob_name, data in (blobs or {}).items():
+            self.put_blob(blob_name, data)
+
+        self.server = ThreadingHTTPServer((host, port), _BlobRequestHandler)
+        self.server.daemon_threads = True
+        self.server.emulator = self
+        self.thread = None
+
+    @property
+    def endpoint(self):
+        """
+        The blob service endpoint URL of the emulated account.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{ACCOUNT_NAME}"
+
+    @property
+    def connection_string(self):
+        """
+        A connection string that points azure-storage-blob clients at the emulator.
+        """
+        return (
+            f"DefaultEndpointsProtocol=http;AccountName={ACCOUNT_NAME};AccountKey={ACCOUNT_KEY};"
+            f"BlobEndpoint={self.endpoint};"
+        )
+
+    def put_blob(self, blob_name, data):
+        """
+        Create or replace a blob, giving it a new ETag and modification time.
+
+        Parameters:
+        - blob_name (str): The name of the blob.
+        - data (bytes): The blob content.
+        """
+        with self.lock:
+            self.blobs[blob_name] = {
+                "data": bytes(data),
+                "etag": f'"0x{hashlib.sha256(data).hexdigest()[:16].upper()}"',
+                "last_modified": formatdate(time.time(), usegmt=True),
+            }
+
+    def get_blob(self, blob_name):
+        """
+        Return the stored blob record, or None if it does not exist.
+        """
+        with self.lock:
+            return self.blobs.get(blob_name)
+
+    def record(self, sent):
+        """
+        Count a served request and the number of body bytes sent.
+        """
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += sent
+
+    def stats(self):
+        """
+        Return the number of requests and body bytes served so far.
+        """
+        with self.lock:
+            return {"requests": self.requests, "bytes_sent": self.bytes_sent}
+
+    def start(self):
+        """
+        Start serving in a daemon thread.
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, name="blob-emulator", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and release the port.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class _BlobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler for the blob paths /<account>/<container>/<blob>.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Requests are counted by the emulator instead of being printed
+        pass
+
+    def do_GET(self):
+        self.serve_blob(send_body=True)
+
+    def do_HEAD(self):
+        self.serve_blob(send_body=False)
+
+    def serve_blob(self, send_body):
+        """
+        Answer a Get Blob or Get Blob Properties request.
+        """
+        emulator = self.server.emulator
+        if emulator.latency:
+            time.sleep(emulator.latency)
+
+        path = unquote(urlsplit(self.path).path).lstrip("/")
+        parts = path.split("/", 2)
+        if len(parts) < 3 or parts[0] != ACCOUNT_NAME or parts[1] != emulator.container_name:
+            return self.send_error_code(404, "ContainerNotFound", send_body)
+
+        blob = emulator.get_blob(parts[2])
+        if blob is None:
+            return self.send_error_code(404, "BlobNotFound", send_body)
+
+        data = blob["data"]
+        status, start, end = 200, 0, len(data) - 1
+        requested_range = self.headers.get("x-ms-range") or self.headers.get("Range")
+        if requested_range and send_body:
+            match = RANGE_PATTERN.fullmatch(requested_range.strip())
+            if match is None or int(match.group(1)) >= len(data):
+                return self.send_error_code(416, "InvalidRange", send_body, content_range=f"bytes */{len(data)}")
+            start = int(match.group(1))
+            end = min(int(match.group(2)), len(data) - 1) if match.group(2) else len(data) - 1
+            status = 206
+
+        body = data[start:end + 1]
+        self.send_response(status)
+        self.send_common_headers()
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", blob["etag"])
+        self.send_header("Last-Modified", blob["last_modified"])
+        self.send_header("x-ms-creation-time", blob["last_modified"])
+        self.send_header("x-ms-blob-type", "BlockBlob")
+        self.send_header("x-ms-lease-state", "available")
+        self.send_header("x-ms-lease-status", "unlocked")
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+
+        sent = 0
+        if send_body:
+            self.wfile.write(body)
+            sent = len(body)
+        emulator.record(sent)
+
+    def send_common_headers(self):
+        """
+        Send the headers that every Blob service response carries.
+        """
+        self.send_header("x-ms-version", API_VERSION)
+        self.send_header("x-ms-request-id", str(uuid.uuid4()))
+        self.send_header("Date", formatdate(time.time(), usegmt=True))
+
+    def send_error_code(self, status, error_code, send_body, content_range=None):
+        """
+        Send a Blob service error response.
+        """
+        body = (
+            f'<?xml version="1.0" encoding="utf-8"?><Error><Code>{error_code}</Code>'
+            f"<Message>{error_code}</Message></Error>"
+        ).encode()
+        self.send_response(status)
+        self.send_common_headers()
+        self.send_header("x-ms-error-code", error_code)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+        self.server.emulator.record(len(body) if send_body else 0)
@@ -0,0 +1,438 @@
+# Script Name: load_harness.py
+# Description: This script load tests the whole FlightLookupApp lifecycle (initialisation with blob download and
+#              ingestion pipeline, lookup bursts and merge) against generated datasets served by a local blob
+#              emulator. N client processes start together, each with its own data, cache and result directories,
+#              and the harness reports throughput, latency percentiles, CPU time and peak RSS per stage as a JSON
+#              file named after the current commit, optionally comparing it with an earlier report.
+# Developer: SSD
+# Created at: 19/10/2026
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import string
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import contextlib
+import multiprocessing
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+script_dir = os.path.dirname(os.path.realpath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, os.pardir))
+
+# The application imports its package relative to schedule_data_processing
+sys.path.insert(0, os.path.join(project_root, "schedule_data_processing"))
+sys.path.insert(0, script_dir)
+
+from blob_emulator import BlobEmulator
+
+CONTAINER_NAME = "load-test"
+STAGES = ("init", "lookup", "merge")
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+AIRCRAFT_TYPES = [
+    # IATA type, type name, F, C, E, M, range lower, range upper, haul
+    (319, "Airbus A319-100", None, 18, None, 120, 150, 3300, "SH"),
+    (320, "Airbus A320-200", None, 24, None, 150, 150, 3300, "SH"),
+    (321, "Airbus A321-200", None, 30, None, 170, 300, 3500, "SH"),
+    (789, "Boeing 787-9", 8, 42, 39, 127, 1000, 7500, "LH"),
+]
+
+
+def generate_datasets(aircraft=50, airports=60, days=30, rotations=3, seed=0):
+    """
+    Generate schedule, airports and fleet files with the same layout as the production blobs.
+
+    Every aircraft flies the given number of round trips from its hub each day, under flight numbers
+    that repeat daily.
+
+    Parameters:
+    - aircraft (int): The number of aircraft in the fleet.
+    - airports (int): The number of airports.
+    - days (int): The number of scheduled days.
+    - rotations (int): The number of round trips per aircraft per day.
+    - seed (int): The random seed.
+
+    Returns:
+    - tuple: The blob contents keyed by file name, and the list of scheduled flight numbers.
+    """
+    rng = random.Random(seed)
+
+    codes = set()
+    while len(codes) < airports:
+        codes.add("".join(rng.choices(string.ascii_uppercase, k=3)))
+    codes = sorted(codes)
+    airport_rows = []
+    for code in codes:
+        city = f"Ville {code.title()}é"
+        airport_rows.append({
+            "Airport": code, "City": code[:2] + "X", "Country": "ZZ", "Name": f"{city} International Airport",
+            "CityName": city, "CountryName": "Zedland", "Lat": round(rng.uniform(25, 60), 6),
+            "Lon": round(rng.uniform(-20, 40), 6), "Alt": rng.randint(0, 2000), "UTCOffset": 0,
+        })
+    coordinates = {row["Airport"]: (row["Lat"], row["Lon"]) for row in airport_rows}
+
+    hubs = codes[:max(1, airports // 10)]
+    fleet_rows = []
+    for index in range(aircraft):
+        iata_type, type_name, first, business, premium, economy, lower, upper, haul = rng.choice(AIRCRAFT_TYPES)
+        seats = sum(value or 0 for value in (first, business, premium, economy))
+        fleet_rows.append({
+            "IATATypeDesignator": iata_type, "TypeName": type_name, "F": first, "C": business, "E": premium,
+            "M": economy, "Total": seats, "Reg": f"ZG{index:04d}", "RangeLower": lower, "RangeUpper": upper,
+            "Hub": rng.choice(hubs), "Haul": haul,
+        })
+
+    start = datetime(2020, 1, 1)
+    legs = []
+    flight_numbers = []
+    for index, row in enumerate(fleet_rows):
+        hub = row["Hub"]
+        destinations = [rng.choice([code for code in codes if code != hub]) for _ in range(rotations)]
+        for day in range(days):
+            departure = start + timedelta(days=day, hours=6, minutes=rng.choice((0, 15, 30, 45)))
+            for rotation, destination in enumerate(destinations):
+                for leg, (origin, arrival) in enumerate(((hub, destination), (destination, hub))):
+                    # Roughly 7.5 nm per minute plus taxi time, from the equirectangular distance
+                    lat_delta = coordinates[origin][0] - coordinates[arrival][0]
+                    lon_delta = coordinates[origin][1] - coordinates[arrival][1]
+                    block = timedelta(minutes=30 + int(60 * (lat_delta ** 2 + lon_delta ** 2) ** 0.5 / 7.5))
+                    flight_number = f"ZG{1000 + index * rotations * 2 + rotation * 2 + leg}"
+                    legs.append({
+                        "aircraft_registration": row["Reg"],
+                        "departure_airport": origin,
+                        "arrival_airport": arrival,
+                        "scheduled_departure_time": departure.isoformat(),
+                        "scheduled_takeoff_time": (departure + timedelta(minutes=10)).isoformat(),
+                        "scheduled_landing_time": (departure + block - timedelta(minutes=10)).isoformat(),
+                        "scheduled_arrival_time": (departure + block).isoformat(),
+                        "flight_number": flight_number,
+                    })
+                    if day == 0:
+                        flight_numbers.append(flight_number)
+                    departure += block + timedelta(minutes=45)
+
+    blobs = {
+        "schedule.json": json.dumps(legs).encode(),
+        "airports.csv": pd.DataFrame(airport_rows).to_csv(index=False).encode(),
+        "fleet.csv": pd.DataFrame(fleet_rows).to_csv(index=False).encode(),
+    }
+    return blobs, flight_numbers
+
+
+def client_config(workspace, connection_string):
+    """
+    Build the application configuration for one client, isolated in its own workspace.
+
+    Parameters:
+    - workspace (str): The client's working directory.
+    - connection_string (str): The blob emulator connection string.
+
+    Returns:
+    - dict: The configuration.
+    """
+    with open(os.path.join(project_root, "config", "config.json")) as f:
+        config = json.load(f)
+
+    for key, directory in (("data_directory", "data"), ("log_directory", "log"),
+                           ("result_directory", "Result"), ("cache_directory", "cache")):
+        config[key] = os.path.join(workspace, directory)
+    config["shared_dataset_name"] = None
+    config["azure_storage"] = {"connection_string": connection_string, "container_name": CONTAINER_NAME}
+    return config
+
+
+def timed(samples, stage, operation):
+    """
+    Run an operation and append its wall time, CPU time and start/end timestamps to the stage samples.
+    """
+    started_at, cpu_start, start = time.time(), time.process_time(), time.perf_counter()
+    operation()
+    samples[stage].append({
+        "seconds": time.perf_counter() - start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "started_at": started_at,
+        "ended_at": time.time(),
+    })
+
+
+def run_client(client_id, options, connection_string, flight_numbers, workspace, barrier, results):
+    """
+    Run one load test client: initialise the app, run lookup bursts and a merge.
+
+    Parameters:
+    - client_id (int): The client number.
+    - options (dict): The load test parameters.
+    - connection_string (str): The blob emulator connection string.
+    - flight_numbers (list): The flight numbers that lookups choose from.
+    - workspace (str): The client's working directory.
+    - barrier (multiprocessing.Barrier): Released once every client is ready to start.
+    - results (multiprocessing.Queue): Receives the client's samples.
+    """
+    from flight_data_app import FlightLookupApp
+
+    rng = random.Random(options["seed"] + client_id)
+    samples = {stage: [] for stage in STAGES}
+    errors = []
+    app = None
+    barrier.wait()
+
+    # The application reports progress on stdout, which would swamp the harness output
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            def initialise():
+                nonlocal app
+                app = FlightLookupApp(client_config(workspace, connection_string))
+            timed(samples, "init", initialise)
+
+            for _ in range(options["lookups"]):
+                batch = [
+                    rng.choice(flight_numbers) if rng.random() >= options["miss_rate"] else "XX0000"
+                    for _ in range(options["batch"])
+                ]
+                timed(samples, "lookup", lambda: app.perform_operation("lookup", [",".join(batch)]))
+
+            for _ in range(options["merges"]):
+                timed(samples, "merge", lambda: app.perform_operation("merge"))
+        except (Exception, SystemExit) as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    results.put({
+        "client": client_id,
+        "samples": samples,
+        "errors": errors,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+    })
+
+
+def summarize_stage(samples):
+    """
+    Summarize the samples of one stage across all clients.
+
+    Parameters:
+    - samples (list): The samples recorded by timed().
+
+    Returns:
+    - dict: The operation count, throughput over the stage's wall-clock window, latency statistics
+      and total CPU time, or None if the stage has no samples.
+    """
+    if not samples:
+        return None
+
+    latencies = np.array([sample["seconds"] for sample in samples]) * 1000
+    window = max(sample["ended_at"] for sample in samples) - min(sample["started_at"] for sample in samples)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "throughput_per_s": round(len(samples) / window, 3) if window > 0 else None,
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(latencies.max()), 3),
+        "cpu_seconds": round(sum(sample["cpu_seconds"] for sample in samples), 3),
+    }
+
+
+def git_revision():
+    """
+    Return the current commit hash and whether the working tree has uncommitted changes.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def run_load_test(options):
+    """
+    Serve generated datasets from a blob emulator, run the clients concurrently and build the report.
+
+    Parameters:
+    - options (dict): The load test parameters.
+
+    Returns:
+    - dict: The load test report.
+    """
+    blobs, flight_numbers = generate_datasets(
+        options["aircraft"], options["airports"], options["days"], options["rotations"], options["seed"]
+    )
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(options["clients"])
+    results = context.Queue()
+    workspace = tempfile.mkdtemp(prefix="flight-load-")
+
+    try:
+        with BlobEmulator(CONTAINER_NAME, blobs, latency=options["latency_ms"] / 1000) as emulator:
+            processes = [
+                context.Process(
+                    target=run_client,
+                    args=(client_id, options, emulator.connection_string, flight_numbers,
+                          os.path.join(workspace, f"client-{client_id}"), barrier, results),
+                )
+                for client_id in range(options["clients"])
+            ]
+            started_at = time.perf_counter()
+            for process in processes:
+                process.start()
+            clients = [results.get(timeout=options["timeout"]) for _ in processes]
+            wall_seconds = time.perf_counter() - started_at
+            for process in processes:
+                process.join()
+            emulator_stats = emulator.stats()
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    clients.sort(key=lambda client: client["client"])
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": options,
+        "dataset": {
+            "legs": len(json.loads(blobs["schedule.json"])),
+            "bytes": {name: len(data) for name, data in blobs.items()},
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "stages": {stage: summarize_stage([s for client in clients for s in client["samples"][stage]]) for stage in STAGES},
+        "clients": [
+            {
+                "client": client["client"],
+                "cpu_seconds": round(client["cpu_seconds"], 3),
+                "peak_rss_mb": round(client["peak_rss_mb"], 1),
+                "errors": client["errors"],
+            }
+            for client in clients
+        ],
+        "peak_rss_mb": round(max(client["peak_rss_mb"] for client in clients), 1),
+        "errors": sum(len(client["errors"]) for client in clients),
+        "emulator": emulator_stats,
+    }
+
+
+def compare_reports(baseline, report, tolerance):
+    """
+    Compare the latency percentiles, throughput and peak RSS of two reports.
+
+    Parameters:
+    - baseline (dict): The earlier report.
+    - report (dict): The current report.
+    - tolerance (float): The relative change (e.g. 0.2 for 20%) beyond which a metric counts as a regression.
+
+    Returns:
+    - tuple: The comparison lines, and the list of regressed metrics.
+    """
+    lines = [f"Comparing {report['commit'][:10]} with baseline {baseline['commit'][:10]}"]
+    regressions = []
+
+    differing = sorted(
+        key for key in set(baseline["parameters"]) | set(report["parameters"])
+        if baseline["parameters"].get(key) != report["parameters"].get(key)
+    )
+    if differing:
+        lines.append(f"  warning: the runs used different parameters ({', '.join(differing)})")
+
+    def check(name, old, new, higher_is_better=False):
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        regressed = -change > tolerance if higher_is_better else change > tolerance
+        lines.append(f"  {name:<28} {old:>12.3f} -> {new:>12.3f} ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+
+    for stage in STAGES:
+        old_stage, new_stage = baseline["stages"].get(stage), report["stages"].get(stage)
+        if not old_stage or not new_stage:
+            continue
+        for metric in LATENCY_METRICS:
+            check(f"{stage}.{metric}", old_stage[metric], new_stage[metric])
+        check(f"{stage}.throughput_per_s", old_stage["throughput_per_s"], new_stage["throughput_per_s"], True)
+    check("peak_rss_mb", baseline["peak_rss_mb"], report["peak_rss_mb"])
+
+    return lines, regressions
+
+
+def main(args=None):
+    """
+    Parse the command line, run the load test, write the report and compare it with a baseline if given.
+    """
+    parser = argparse.ArgumentParser(description="Load test the flight data application against a local blob emulator.")
+    parser.add_argument("--clients", type=int, default=4, help="Number of concurrent client processes.")
+    parser.add_argument("--lookups", type=int, default=200, help="Lookup calls per client.")
+    parser.add_argument("--batch", type=int, default=5, help="Flight numbers per lookup call.")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="Fraction of looked up flight numbers that do not exist.")
+    parser.add_argument("--merges", type=int, default=1, help="Merge calls per client.")
+    parser.add_argument("--aircraft", type=int, default=50, help="Number of generated aircraft.")
+    parser.add_argument("--airports", type=int, default=60, help="Number of generated airports.")
+    parser.add_argument("--days", type=int, default=30, help="Number of generated schedule days.")
+    parser.add_argument("--rotations", type=int, default=3, help="Round trips per aircraft per day.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every emulator response.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the datasets and lookups.")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds to wait for each client.")
+    parser.add_argument("--output", help="Report path (default: load_reports/<commit>.json).")
+    parser.add_argument("--compare", help="Baseline report to compare with; regressions make the exit status 1.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change counted as a regression.")
+    parsed = parser.parse_args(args)
+
+    options = {
+        key: getattr(parsed, key) for key in (
+            "clients", "lookups", "batch", "miss_rate", "merges", "aircraft", "airports",
+            "days", "rotations", "latency_ms", "seed", "timeout",
+        )
+    }
+    report = run_load_test(options)
+
+    output = parsed.output or os.path.join(
+        project_root, "load_reports", f"{report['commit'][:12]}{'-dirty' if report['dirty'] else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for stage, summary in report["stages"].items():
+        if summary:
+            print(f"{stage:<7} n={summary['count']:<6} {summary['throughput_per_s']}/s  "
+                  f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms")
+    print(f"peak RSS {report['peak_rss_mb']} MB, {report['errors']} errors, report written to {output}")
+
+    if parsed.compare:
+        with open(parsed.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare_reports(baseline, report, parsed.tolerance)
+        print("\n".join(lines))
+        if regressions:
+            return 1
+
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,21 @@ import unittest
 import os
 import sys
 import json
+import logging
+import gzip
+import shutil
+import tempfile
+import io
+import contextlib
+import types
+import threading
+import warnings
+import pickle
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker
+
+import pandas as pd
 
 # Get the directory of the current script
 script_dir = os.path.dirname(os.path.realpath(__file__))
@@ -14,6 +29,18 @@ sys.path.append(project_root)
 
 #import the module
 from schedule_data_processing.flight_data_app import FlightLookupApp
+from schedule_data_processing.package.json_stream import read_json_stream
+from schedule_data_processing.package.log_config import JsonFormatter, QueueHandler, log_file_name
+from schedule_data_processing.package.utilization import compute_utilization
+from schedule_data_processing.package.shared_dataset import publish_frames, attach_frames
+from schedule_data_processing.package.integrity import check_integrity, IntegrityError
+from schedule_data_processing.package.data_processor import FlightDataProcessor
+from schedule_data_processing.package.result_diff import diff_results
+from schedule_data_processing.package.normalization import normalize_column, normalize_strings, normalize_text
+from schedule_data_processing.package.itinerary import ConnectionIndex
+from schedule_data_processing.package.watcher import SourceWatcher
+from schedule_data_processing.package.pipeline import PipelineRunner, value_digest
+from tests.blob_emulator import BlobEmulator
 
 class TestCLI(unittest.TestCase):
     """
@@ -102,5 +129,812 @@ class TestCLI(unittest.TestCase):
         result = self.app_instance.merge_data(self.schedule, self.fleet, self.airports)
         self.assertEqual(result, expected_result, f"Expected: {expected_result}, Got: {result}")
 
+class TestJsonStream(unittest.TestCase):
+    """
+    A test case for the streaming JSON reader used to load schedule.json.
+    """
+    def setUp(self):
+        self.schedule_path = os.path.join(project_root, "data_files", "schedule.json")
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_read_json(self):
+        """
+        The streamed frame must be identical to pd.read_json, whatever the batch size.
+        """
+        expected = pd.read_json(self.schedule_path)
+        for batch_size in (1, 50, 100000):
+            with self.subTest(batch_size=batch_size):
+                pd.testing.assert_frame_equal(read_json_stream(self.schedule_path, batch_size), expected)
+
+    def test_compressed_ndjson(self):
+        """
+        Gzip-compressed newline-delimited JSON is decoded on the fly.
+        """
+        with open(self.schedule_path) as f:
+            records = json.load(f)
+        ndjson_path = os.path.join(self.temp_dir, "schedule.ndjson.gz")
+        with gzip.open(ndjson_path, "wt") as f:
+            f.write("\n".join(json.dumps(record) for record in records))
+
+        pd.testing.assert_frame_equal(read_json_stream(ndjson_path, 64), pd.read_json(self.schedule_path))
+
+class TestUtilization(unittest.TestCase):
+    """
+    A test case for the aircraft utilization analytics.
+    """
+    def test_compute_utilization(self):
+        """
+        Block hours, legs and hub dwell time are aggregated per registration and per type.
+        """
+        schedule = pd.DataFrame({
+            "aircraft_registration": ["ZGAAB", "ZGAAA", "ZGAAA"],
+            "departure_airport": ["CDG", "LHR", "RAK"],
+            "arrival_airport": ["LHR", "RAK", "LHR"],
+            "scheduled_departure_time": pd.to_datetime(["2020-01-01 08:00", "2020-01-01 06:45", "2020-01-01 10:30"]),
+            "scheduled_arrival_time": pd.to_datetime(["2020-01-01 09:00", "2020-01-01 10:00", "2020-01-01 13:45"]),
+        })
+        fleet = pd.DataFrame({
+            "Reg": ["ZGAAA", "ZGAAB", "ZGAAC"],
+            "TypeName": ["Airbus A319100", "Airbus A319100", "Airbus A320200"],
+            "Hub": ["LHR", "CDG", "FRA"],
+        })
+
+        by_registration, by_type = compute_utilization(schedule, fleet)
+        by_registration = by_registration.set_index("Reg")
+
+        self.assertEqual(by_registration.loc["ZGAAA", "legs"], 2)
+        self.assertEqual(by_registration.loc["ZGAAA", "block_hours"], 6.5)
+        self.assertEqual(by_registration.loc["ZGAAA", "rotations"], 1)
+        self.assertEqual(by_registration.loc["ZGAAC", "legs"], 0)
+        self.assertEqual(by_type.set_index("TypeName").loc["Airbus A319100", "active_aircraft"], 2)
+
+    def test_compute_utilization_with_categorical_fleet(self):
+        """
+        Categorical fleet columns, as attached from a shared dataset, give one row per type present in the fleet.
+        """
+        schedule = pd.DataFrame({
+            "aircraft_registration": ["ZGAAA"],
+            "departure_airport": ["LHR"],
+            "arrival_airport": ["RAK"],
+            "scheduled_departure_time": pd.to_datetime(["2020-01-01 06:45"]),
+            "scheduled_arrival_time": pd.to_datetime(["2020-01-01 10:00"]),
+        })
+        fleet = pd.DataFrame({
+            "Reg": pd.Categorical(["ZGAAA", "ZGAAB"]),
+            "TypeName": pd.Categorical(
+                ["Airbus A319100", "Airbus A320200"], categories=["Airbus A319100", "Airbus A320200", "Boeing 7879"]
+            ),
+            "Hub": pd.Categorical(["LHR", "CDG"]),
+        })
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            _, by_type = compute_utilization(schedule, fleet)
+
+        self.assertEqual(list(by_type["TypeName"]), ["Airbus A319100", "Airbus A320200"])
+        self.assertEqual(list(by_type["aircraft"]), [1, 1])
+        self.assertFalse(by_type["legs_per_day"].isna().any())
+
+class TestIntegrity(unittest.TestCase):
+    """
+    A test case for the referential integrity checks run during ingestion.
+    """
+    def setUp(self):
+        self.schedule = pd.DataFrame({
+            "aircraft_registration": ["ZGAAA", "ZGXXX", "ZGAAA"],
+            "departure_airport": ["LHR", "LHR", "RAK"],
+            "arrival_airport": ["RAK", "RAK", "QQQ"],
+            "flight_number": ["ZG5001", "ZG5003", "ZG5002"],
+        })
+        self.fleet = pd.DataFrame({"Reg": ["ZGAAA"]})
+        self.airports = pd.DataFrame({"Airport": ["LHR", "RAK"]})
+
+    def test_orphan_report(self):
+        """
+        Orphans are counted per foreign key, with examples.
+        """
+        _, report = check_integrity(self.schedule, self.fleet, self.airports, "keep")
+        self.assertEqual(report["orphan_legs"], 2)
+        self.assertEqual(report["checks"]["aircraft_registration"]["examples"], ["ZGXXX"])
+        self.assertEqual(report["checks"]["arrival_airport"]["examples"], ["QQQ"])
+
+    def test_policies(self):
+        """
+        'drop' removes orphan legs, 'keep' leaves them, and 'fail' raises a ValueError.
+        """
+        dropped, _ = check_integrity(self.schedule, self.fleet, self.airports, "drop")
+        self.assertEqual(list(dropped["flight_number"]), ["ZG5001"])
+
+        kept, _ = check_integrity(self.schedule, self.fleet, self.airports, "keep")
+        self.assertEqual(len(kept), 3)
+
+        with self.assertRaises(IntegrityError) as context:
+            check_integrity(self.schedule, self.fleet, self.airports, "fail")
+        self.assertEqual(context.exception.report["orphan_legs"], 2)
+
+    def test_keep_policy_preserves_integer_columns(self):
+        """
+        Null fleet data on orphan legs must not turn the integer fleet columns into floats for valid legs.
+        """
+        app = FlightLookupApp.__new__(FlightLookupApp)
+        app.config = {"integrity_policy": "keep"}
+        fleet = pd.DataFrame({"Reg": ["ZGAAA"], "Total": [138], "RangeUpper": [3300]})
+        airports = pd.DataFrame({"Airport": ["LHR", "RAK", "QQQ"], "Alt": [83, 1545, 10]})
+
+        joined = app.join_data(self.schedule, fleet, airports)
+
+        self.assertEqual(joined[["Total", "RangeUpper", "Alt"]].to_csv(index=False).splitlines()[1], "138,3300,1545")
+        self.assertTrue(pd.isna(joined.loc[joined["aircraft_registration"] == "ZGXXX", "Total"]).all())
+
+    def test_distance_row_with_unknown_airport(self):
+        """
+        The per-row distance is NaN instead of failing when an airport is unknown.
+        """
+        processor = FlightDataProcessor.__new__(FlightDataProcessor)
+        processor.import_libraries()
+        airports = pd.DataFrame({"Airport": ["LHR", "RAK"], "Lat": [51.4706, 31.6069], "Lon": [-0.461941, -8.0363]})
+
+        distance = processor.calculate_distance_row(self.schedule.iloc[0], airports)
+        self.assertAlmostEqual(distance, 1237.5, places=0)
+        self.assertTrue(pd.isna(processor.calculate_distance_row(self.schedule.iloc[2], airports)))
+
+class TestResultDiff(unittest.TestCase):
+    """
+    A test case for the change detection between two merge outputs.
+    """
+    def test_diff_results(self):
+        """
+        Added, removed and modified legs are detected, with the changed columns of modified legs.
+        """
+        keys = ["flight_number", "scheduled_departure_time"]
+        old = pd.DataFrame({
+            "flight_number": ["ZG5001", "ZG5002", "ZG5003"],
+            "scheduled_departure_time": ["2020-01-01 06:45:00", "2020-01-01 10:30:00", "2020-01-01 14:15:00"],
+            "arrival_airport": ["RAK", "LHR", "ALA"],
+            "Haul": ["SH", "SH", "LH"],
+        }).set_index(keys)
+        new = old.drop(("ZG5003", "2020-01-01 14:15:00"))
+        new.loc[("ZG5001", "2020-01-01 06:45:00"), "arrival_airport"] = "AGP"
+        new.loc[("ZG5004", "2020-01-01 18:00:00"), :] = ["LHR", "SH"]
+
+        delta = {record["op"]: record for record in diff_results(old, new, keys)}
+
+        self.assertEqual(delta["add"]["key"]["flight_number"], "ZG5004")
+        self.assertEqual(delta["remove"]["key"]["flight_number"], "ZG5003")
+        self.assertEqual(delta["modify"]["changes"], {"arrival_airport": ["RAK", "AGP"]})
+
+class TestNormalization(unittest.TestCase):
+    """
+    A test case for the column normalization.
+    """
+    def test_normalize_column_matches_per_value_cleaning(self):
+        """
+        Normalizing distinct values and mapping them back gives the same result as cleaning every cell.
+        """
+        values = pd.Series(["São  Paulo", None, float("nan"), 1, "1", "2020-01-01", "São  Paulo"], index=range(3, 10))
+
+        expected = values.apply(lambda value: normalize_text(str(value)))
+        pd.testing.assert_series_equal(normalize_column(values), expected)
+        self.assertEqual(normalize_column(values)[3], "Sao Paulo")
+
+    def test_parallel_normalization_matches_serial(self):
+        """
+        Strings normalized in spawned worker processes match the serial result.
+        """
+        texts = ["São  Paulo", "Zürich!", " Málaga ", "2020-01-01"] * 5
+
+        self.assertEqual(normalize_strings(texts, workers=2, parallel_threshold=1), normalize_strings(texts, workers=1))
+
+class TestBlobEmulator(unittest.TestCase):
+    """
+    A test case for the local blob storage emulator used by the load harness.
+    """
+    def test_blob_client_downloads_from_emulator(self):
+        """
+        The Azure SDK downloads blobs from the emulator in ranged chunks and reads their properties.
+        """
+        from azure.storage.blob import BlobClient
+
+        data = os.urandom(300000)
+        with BlobEmulator("container", {"schedule.json": data}) as emulator:
+            blob = BlobClient.from_connection_string(
+                emulator.connection_string, "container", "schedule.json",
+                max_single_get_size=65536, max_chunk_get_size=65536,
+            )
+            self.assertEqual(blob.download_blob().readall(), data)
+            etag = blob.get_blob_properties().etag
+
+            emulator.put_blob("schedule.json", b"[]")
+            self.assertNotEqual(blob.get_blob_properties().etag, etag)
+
+class TestItinerary(unittest.TestCase):
+    """
+    A test case for the itinerary search.
+    """
+    def test_search_respects_connection_times(self):
+        """
+        Connections must fall within the connect time window, and totals cover every leg.
+        """
+        schedule = pd.DataFrame({
+            "flight_number": ["ZG1", "ZG2", "ZG3", "ZG4", "ZG5"],
+            "aircraft_registration": ["ZGAAA", "ZGAAB", "ZGAAB", "ZGAAC", "ZGAAA"],
+            "departure_airport": ["LHR", "FRA", "FRA", "JFK", "LHR"],
+            "arrival_airport": ["FRA", "MCO", "JFK", "MCO", "MCO"],
+            "scheduled_departure_time": pd.to_datetime([
+                "2020-01-01 06:00", "2020-01-01 08:00", "2020-01-01 08:50", "2020-01-01 12:45", "2020-01-01 09:00",
+            ]),
+            "scheduled_arrival_time": pd.to_datetime([
+                "2020-01-01 07:30", "2020-01-01 17:00", "2020-01-01 11:00", "2020-01-01 15:30", "2020-01-01 18:00",
+            ]),
+            "distance_nm": [350.0, 4200.0, 3300.0, 820.0, 3800.0],
+        })
+        fleet = pd.DataFrame({"Reg": ["ZGAAA", "ZGAAB", "ZGAAC"], "Total": [180, 300, 150]})
+
+        itineraries = ConnectionIndex(schedule, fleet).search("LHR", "MCO", limit=None)
+        routes = [[leg["flight_number"] for leg in itinerary["legs"]] for itinerary in itineraries]
+
+        # ZG1 -> ZG2 leaves only 30 minutes to connect
+        self.assertEqual(routes, [["ZG1", "ZG3", "ZG4"], ["ZG5"]])
+        self.assertEqual(itineraries[0]["connection_minutes"], [80, 105])
+        self.assertEqual(itineraries[0]["total_distance_nm"], 4470.0)
+        self.assertEqual(itineraries[0]["seats"], 150)
+
+    def test_search_filters(self):
+        """
+        The stop limit and departure window filter itineraries, and no itinerary passes through the origin again.
+        """
+        schedule = pd.DataFrame({
+            "flight_number": ["ZG1", "ZG2", "ZG3", "ZG4", "ZG5"],
+            "aircraft_registration": ["ZGAAA", "ZGAAB", "ZGAAA", "ZGAAB", "ZGAAC"],
+            "departure_airport": ["LHR", "FRA", "LHR", "FRA", "LHR"],
+            "arrival_airport": ["FRA", "MCO", "MCO", "LHR", "MCO"],
+            "scheduled_departure_time": pd.to_datetime([
+                "2020-01-01 06:00", "2020-01-01 08:30", "2020-01-01 09:00", "2020-01-01 08:30", "2020-01-01 11:00",
+            ]),
+            "scheduled_arrival_time": pd.to_datetime([
+                "2020-01-01 07:30", "2020-01-01 17:00", "2020-01-01 18:00", "2020-01-01 10:00", "2020-01-01 20:00",
+            ]),
+            "distance_nm": [350.0, 4200.0, 3800.0, 350.0, 3800.0],
+        })
+        fleet = pd.DataFrame({"Reg": ["ZGAAA", "ZGAAB", "ZGAAC"], "Total": [180, 300, 150]})
+        index = ConnectionIndex(schedule, fleet)
+
+        def routes(**filters):
+            itineraries = index.search("LHR", "MCO", limit=None, **filters)
+            return [[leg["flight_number"] for leg in itinerary["legs"]] for itinerary in itineraries]
+
+        # ZG1 -> ZG4 -> ZG5 meets the connect times but returns to LHR
+        self.assertEqual(routes(), [["ZG1", "ZG2"], ["ZG3"], ["ZG5"]])
+        self.assertEqual(routes(max_stops=1), [["ZG1", "ZG2"], ["ZG3"], ["ZG5"]])
+        self.assertEqual(routes(max_stops=0), [["ZG3"], ["ZG5"]])
+        self.assertEqual(routes(depart_after="2020-01-01 08:00", depart_before="2020-01-01 09:00"), [["ZG3"]])
+        self.assertEqual(routes(depart_after="2020-01-01 09:01"), [["ZG5"]])
+        self.assertEqual(routes(depart_before="2020-01-01 06:00", max_stops=0), [])
+
+        with self.assertRaises(ValueError):
+            index.search("LHR", "MCO", max_stops=3)
+
+class TestStreamingLookup(unittest.TestCase):
+    """
+    A test case for the NDJSON streaming lookup.
+    """
+    def setUp(self):
+        times = pd.to_datetime(["2020-01-01 06:45", "2020-01-01 10:30"])
+        schedule = pd.DataFrame({
+            "aircraft_registration": ["ZGAAA", "ZGAAA"],
+            "departure_airport": ["LHR", "RAK"],
+            "arrival_airport": ["RAK", "LHR"],
+            "scheduled_departure_time": times,
+            "scheduled_takeoff_time": times,
+            "scheduled_landing_time": times,
+            "scheduled_arrival_time": times,
+            "flight_number": ["ZG5001", "ZG5002"],
+            "distance_nm": [1250.5, 1250.5],
+        })
+        fleet = pd.DataFrame({
+            "IATATypeDesignator": [319], "TypeName": ["Airbus A319100"], "F": [None], "C": [18], "E": [None],
+            "M": [120], "Total": [138], "Reg": ["ZGAAA"], "RangeLower": [150], "RangeUpper": [3300],
+            "Hub": ["LHR"], "Haul": ["SH"],
+        })
+
+        # Skip __init__, which downloads and processes the source files
+        self.app = FlightLookupApp.__new__(FlightLookupApp)
+        self.app.config = {}
+        self.app.data_processor = types.SimpleNamespace(schedule=schedule, fleet=fleet, shared_frames=None)
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_read_flight_numbers(self):
+        """
+        Flight numbers may be comma-separated, one per line, or both, from a file or from stdin.
+        """
+        input_path = os.path.join(self.temp_dir, "flights.txt")
+        with open(input_path, "w") as f:
+            f.write("ZG5001, ZG5002\n\nZG5003\n")
+        self.assertEqual(list(self.app.read_flight_numbers(input_path)), ["ZG5001", "ZG5002", "ZG5003"])
+
+        with mock.patch("sys.stdin", io.StringIO("ZG5002\nZG5001,\n")):
+            self.assertEqual(list(self.app.read_flight_numbers("-")), ["ZG5002", "ZG5001"])
+
+    def test_stream_lookup(self):
+        """
+        Each flight yields its result, or an error record if it is not found.
+        """
+        records = list(self.app.stream_lookup(["ZG5002", "ZG9999"]))
+
+        self.assertEqual(records[0]["departure_airport"], "RAK")
+        self.assertEqual(records[0]["total_seats"], "138")
+        self.assertEqual(records[1], {"error": "Flight ZG9999 not found."})
+
+    def test_write_ndjson_flushes_every_record(self):
+        """
+        Every record is written as one JSON line and flushed before the next one is produced.
+        """
+        flushed = []
+        output = io.StringIO()
+        output.flush = lambda: flushed.append(output.getvalue().count("\n"))
+
+        def records():
+            for number in ("ZG5001", "ZG9999"):
+                # The previous record must already be visible to the reader
+                self.assertEqual(output.getvalue().count("\n"), len(flushed))
+                yield from self.app.stream_lookup([number])
+
+        with mock.patch("sys.stdout", output):
+            count = self.app.write_ndjson(records())
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 2)
+        self.assertEqual(flushed, [1, 2])
+        self.assertEqual(lines[0]["flight_number"], "ZG5001")
+        self.assertEqual(lines[1], {"error": "Flight ZG9999 not found."})
+
+    def test_run_streaming_lookup_to_file(self):
+        """
+        Flight numbers from the command line and from --input are streamed to the --output file.
+        """
+        input_path = os.path.join(self.temp_dir, "flights.txt")
+        output_path = os.path.join(self.temp_dir, "results.ndjson")
+        with open(input_path, "w") as f:
+            f.write("ZG5002\n")
+
+        # Only output to stdout sends the loading progress messages to stderr
+        self.assertTrue(FlightLookupApp.streams_to_stdout(FlightLookupApp.parse_arguments(["flight_data_app.py", "lookup", "--ndjson", "ZG5001"])))
+        args = FlightLookupApp.parse_arguments(["flight_data_app.py", "lookup", "ZG5001", "--input", input_path, "--output", output_path])
+        self.assertFalse(FlightLookupApp.streams_to_stdout(args))
+        self.app.run_streaming_lookup(args)
+
+        with open(output_path) as f:
+            self.assertEqual([json.loads(line)["flight_number"] for line in f], ["ZG5001", "ZG5002"])
+
+class TestLogConfig(unittest.TestCase):
+    """
+    A test case for the queued structured logging.
+    """
+    def make_record(self, exc_info=None):
+        return logging.getLogger("flight").makeRecord(
+            "flight", logging.ERROR, __file__, 1, "Lookup of %s failed", ("ZG5001",), exc_info,
+            extra={"flight_number": "ZG5001", "attempt": 2},
+        )
+
+    def test_json_formatter(self):
+        """
+        Records become one JSON object with the message, the extra fields and the exception text.
+        """
+        try:
+            raise ValueError("Flight ZG5001 not found.")
+        except ValueError:
+            record = self.make_record(sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["logger"], "flight")
+        self.assertEqual(entry["message"], "Lookup of ZG5001 failed")
+        self.assertEqual((entry["flight_number"], entry["attempt"]), ("ZG5001", 2))
+        self.assertIn("ValueError: Flight ZG5001 not found.", entry["exception"])
+        self.assertNotIn("exc_info", entry)
+
+    def test_queue_handler_prepare(self):
+        """
+        Queued records carry the merged message and the rendered traceback instead of live objects.
+        """
+        try:
+            raise ValueError("Flight ZG5001 not found.")
+        except ValueError:
+            record = self.make_record(sys.exc_info())
+
+        prepared = QueueHandler(None).prepare(record)
+
+        self.assertEqual((prepared.msg, prepared.args, prepared.exc_info), ("Lookup of ZG5001 failed", None, None))
+        self.assertIn("ValueError: Flight ZG5001 not found.", prepared.exc_text)
+        self.assertIs(record.exc_info[0], ValueError)
+
+        entry = json.loads(JsonFormatter().format(prepared))
+        self.assertEqual(entry["message"], "Lookup of ZG5001 failed")
+        self.assertEqual(entry["flight_number"], "ZG5001")
+        self.assertIn("ValueError: Flight ZG5001 not found.", entry["exception"])
+
+    def test_log_file_name(self):
+        """
+        Processes that log alongside others get a file name of their own.
+        """
+        self.assertEqual(log_file_name("data_log.txt"), "data_log.txt")
+        self.assertEqual(log_file_name("data_log.txt", per_process=True), f"data_log.{os.getpid()}.txt")
+
+class TestSharedDataset(unittest.TestCase):
+    """
+    A test case for publishing datasets to shared memory.
+    """
+    def test_publish_attach_round_trip(self):
+        """
+        Attached frames decode to the published values and dtypes, are read-only, and can be indexed by a column.
+        """
+        schedule = pd.DataFrame({
+            "flight_number": ["ZG5001", "ZG5002", None],
+            "distance_nm": [1250.5, float("nan"), 300.0],
+            "legs": [1, 2, 3],
+            "scheduled_departure_time": pd.to_datetime(["2020-01-01 06:45", "2020-01-01 10:30", "2020-01-02 08:00"]),
+        })
+        lookup = schedule.iloc[:2]
+        name = f"test_shared_{os.getpid()}"
+
+        shm = publish_frames(name, {"distances": schedule, "lookup": lookup}, {"distances": "abc"}, {"lookup": "flight_number"})
+        try:
+            frames, digests, attached = attach_frames(name)
+            # attach_frames unregisters the segment on behalf of workers; this process is also the publisher
+            resource_tracker.register(shm._name, "shared_memory")
+            distances = frames["distances"]
+
+            self.assertEqual(digests, {"distances": "abc"})
+            self.assertIsInstance(distances["flight_number"].dtype, pd.CategoricalDtype)
+            self.assertEqual(list(distances["flight_number"][:2]), ["ZG5001", "ZG5002"])
+            self.assertTrue(pd.isna(distances["flight_number"][2]))
+            for column in ("distance_nm", "legs", "scheduled_departure_time"):
+                pd.testing.assert_series_equal(distances[column], schedule[column])
+            self.assertTrue(distances["distance_nm"].isna()[1])
+
+            self.assertFalse(distances["legs"].to_numpy().flags.writeable)
+            with self.assertRaises(ValueError):
+                distances["legs"].to_numpy()[0] = 5
+
+            self.assertEqual(frames["lookup"].loc["ZG5002", "legs"], 2)
+            self.assertNotIn("ZG9999", frames["lookup"].index)
+
+            del frames, distances
+            attached.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        with self.assertRaises(FileNotFoundError):
+            attach_frames(name)
+
+class TestSourceWatcher(unittest.TestCase):
+    """
+    A test case for watching the sources for changes.
+    """
+    def make_watcher(self, fingerprints, debounce=0):
+        """
+        Create a watcher over fake fingerprints, polling without delay.
+        """
+        return SourceWatcher(["schedule", "fleet"], lambda name: fingerprints[name], interval=0, debounce=debounce)
+
+    def test_reports_changed_sources(self):
+        """
+        Only the changed sources are reported, and each change is reported once.
+        """
+        fingerprints = {"schedule": "s1", "fleet": "f1"}
+        watcher = self.make_watcher(fingerprints)
+
+        fingerprints["fleet"] = "f2"
+        self.assertEqual(watcher.wait_for_changes(threading.Event()), {"fleet"})
+        fingerprints["schedule"] = "s2"
+        self.assertEqual(watcher.wait_for_changes(threading.Event()), {"schedule"})
+        self.assertEqual(watcher.baseline, {"schedule": "s2", "fleet": "f2"})
+
+    def test_debounce_waits_for_the_burst_to_settle(self):
+        """
+        A burst of changes is reported once with the final fingerprints, and a change that is reverted
+        within the debounce period is not reported at all.
+        """
+        watcher = SourceWatcher(["schedule"], lambda name: "s1", interval=0, debounce=0.05)
+        polls = iter(["s2", "s3"])
+        watcher.fingerprint = lambda name: next(polls, "s4")
+        self.assertEqual(watcher.wait_for_changes(threading.Event()), {"schedule"})
+        self.assertEqual(watcher.baseline, {"schedule": "s4"})
+
+        # Stop well after the debounce period, so a reported revert would have returned first
+        stop = threading.Event()
+        timer = threading.Timer(0.3, stop.set)
+        polls = iter(["s5"])
+        watcher.fingerprint = lambda name: next(polls, "s4")
+        timer.start()
+        self.assertEqual(watcher.wait_for_changes(stop), set())
+        self.assertEqual(watcher.baseline, {"schedule": "s4"})
+
+    def test_failed_check_is_not_a_change(self):
+        """
+        A source that cannot be checked keeps its previous fingerprint.
+        """
+        fingerprints = {"schedule": "s1", "fleet": "f1"}
+        watcher = self.make_watcher(fingerprints)
+        stop = threading.Event()
+
+        def fingerprint(name):
+            if name == "fleet":
+                stop.set()
+                raise ConnectionError("Storage account unreachable.")
+            return fingerprints[name]
+
+        watcher.fingerprint = fingerprint
+        self.assertEqual(watcher.wait_for_changes(stop), set())
+        self.assertEqual(watcher.baseline, {"schedule": "s1", "fleet": "f1"})
+
+    def test_retry_reports_the_sources_again(self):
+        """
+        Sources whose refresh failed are reported again on the next poll.
+        """
+        fingerprints = {"schedule": "s1", "fleet": "f1"}
+        watcher = self.make_watcher(fingerprints)
+
+        fingerprints["fleet"] = "f2"
+        self.assertEqual(watcher.wait_for_changes(threading.Event()), {"fleet"})
+        watcher.retry({"fleet"})
+        self.assertEqual(watcher.wait_for_changes(threading.Event()), {"fleet"})
+
+    def test_stop_event(self):
+        """
+        Waiting returns no changes once stopped.
+        """
+        stop = threading.Event()
+        stop.set()
+        self.assertEqual(self.make_watcher({"schedule": "s1", "fleet": "f1"}).wait_for_changes(stop), set())
+
+    def test_fleet_refresh_keeps_distances_cached(self):
+        """
+        With a cache warmed by an earlier process, a fleet-only change re-runs the integrity check but not
+        the distances.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shutil.copytree(os.path.join(project_root, "data_files"), os.path.join(directory, "data_files"))
+
+        def make_processor():
+            processor = FlightDataProcessor.__new__(FlightDataProcessor)
+            processor.config = {}
+            processor.data_directory = os.path.join(directory, "data_files")
+            processor.cache_directory = os.path.join(directory, "cache")
+            processor.pipeline = None
+            processor.schedule = processor.fleet = processor.airports = processor.integrity_report = None
+            processor.import_libraries()
+            processor.build_pipeline()
+            processor.run_pipeline()
+            return processor
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_processor()
+            processor = make_processor()
+
+            fleet_path = os.path.join(directory, "data_files", "fleet.csv")
+            fleet = pd.read_csv(fleet_path)
+            fleet.loc[0, "Total"] += 2
+            fleet.to_csv(fleet_path, index=False)
+
+            processor.pipeline.report.clear()
+            processor.refresh_data(["fleet"], download=False)
+
+        statuses = {name: status for name, status, _ in processor.pipeline.report}
+        self.assertEqual(statuses, {"fleet": "miss", "integrity": "miss", "distances": "hit"})
+        self.assertEqual(processor.fleet.loc[0, "Total"], fleet.loc[0, "Total"])
+
+    def test_failed_download_keeps_previous_file(self):
+        """
+        A download that fails part-way leaves the previous copy of the file untouched and no temporary file behind.
+        """
+        def readinto(f):
+            f.write(b"[{\"flight_number\": ")
+            raise ConnectionError("Connection reset.")
+
+        blob = mock.Mock()
+        blob.download_blob.return_value.readinto.side_effect = readinto
+        processor = FlightDataProcessor.__new__(FlightDataProcessor)
+        processor.config = {"azure_storage": {"connection_string": "", "container_name": "data"}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, "schedule.json")
+            with open(target, "w") as f:
+                f.write("[]")
+
+            with mock.patch(
+                "schedule_data_processing.package.data_processor.BlobClient", create=True
+            ) as blob_client:
+                blob_client.from_connection_string.return_value = blob
+                with self.assertRaises(ConnectionError):
+                    processor.download_blob("schedule.json", target, exit_on_error=False)
+                with self.assertRaises(SystemExit):
+                    processor.download_blob("schedule.json", target)
+
+            with open(target) as f:
+                self.assertEqual(f.read(), "[]")
+            self.assertEqual(os.listdir(directory), ["schedule.json"])
+
+class TestPipeline(unittest.TestCase):
+    """
+    A test case for the cached pipeline runner.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.input_path = os.path.join(self.directory, "fleet.csv")
+        self.limit_path = os.path.join(self.directory, "limit.txt")
+        self.cache_directory = os.path.join(self.directory, "cache")
+        self.write_input([138, 180])
+        self.write_limit(500)
+
+    def write_input(self, seats):
+        pd.DataFrame({"Reg": ["ZGAAA", "ZGAAB"], "Total": seats}).to_csv(self.input_path, index=False)
+
+    def write_limit(self, limit):
+        with open(self.limit_path, "w") as f:
+            f.write(str(limit))
+
+    def make_runner(self, calls):
+        """
+        Build a pipeline that keeps the aircraft within a seat limit and totals their seats, recording
+        the stages it computes.
+        """
+        def stage(name, func):
+            def run(*args):
+                calls.append(name)
+                return func(*args)
+            return run
+
+        def read_limit():
+            with open(self.limit_path) as f:
+                return int(f.read())
+
+        runner = PipelineRunner(self.cache_directory)
+        runner.add_stage("load", stage("load", lambda: pd.read_csv(self.input_path)), files=[self.input_path])
+        runner.add_stage("limit", stage("limit", read_limit), files=[self.limit_path])
+        runner.add_stage(
+            "clean", stage("clean", lambda fleet, limit: fleet[fleet["Total"] <= limit]), inputs=["load", "limit"]
+        )
+        runner.add_stage("total", stage("total", lambda fleet: int(fleet["Total"].sum())), inputs=["clean"])
+        return runner
+
+    def statuses(self, runner):
+        return [(name, status) for name, status, _ in runner.report]
+
+    def test_hit_after_unchanged_rerun(self):
+        """
+        A new runner over unchanged inputs serves every stage from the cache.
+        """
+        self.assertEqual(self.make_runner([]).run("total"), 318)
+
+        calls = []
+        runner = self.make_runner(calls)
+        self.assertEqual(runner.run("total"), 318)
+        self.assertEqual(
+            self.statuses(runner), [("load", "hit"), ("limit", "hit"), ("clean", "hit"), ("total", "hit")]
+        )
+        self.assertEqual(calls, [])
+
+    def test_miss_after_input_change(self):
+        """
+        Changing an input file recomputes every stage that depends on it.
+        """
+        self.make_runner([]).run("total")
+        self.write_input([140, 180])
+
+        runner = self.make_runner([])
+        self.assertEqual(runner.run("total"), 320)
+        self.assertEqual(
+            self.statuses(runner), [("load", "miss"), ("limit", "hit"), ("clean", "miss"), ("total", "miss")]
+        )
+
+    def test_invalidate_downstream_stops_at_unchanged_output(self):
+        """
+        A stage recomputed with an unchanged output leaves its downstream stages cached, also when its other
+        inputs were loaded from the cache.
+        """
+        self.make_runner([]).run("total")
+        calls = []
+        runner = self.make_runner(calls)
+        runner.run("total")
+
+        # Both aircraft stay within the new limit, so 'clean' gives the same frame as before
+        self.write_limit(400)
+        self.assertEqual(runner.invalidate_downstream(["limit"]), {"limit", "clean", "total"})
+        runner.report.clear()
+
+        self.assertEqual(runner.run("total"), 318)
+        self.assertEqual(self.statuses(runner), [("limit", "miss"), ("clean", "miss"), ("total", "hit")])
+        self.assertEqual(calls, ["limit", "clean"])
+
+    def test_miss_when_output_file_changes(self):
+        """
+        A stage is recomputed when a file it writes no longer matches the cached output.
+        """
+        output_path = os.path.join(self.directory, "total.txt")
+
+        def write(total):
+            with open(output_path, "w") as f:
+                f.write(str(total))
+            return output_path
+
+        def make_runner():
+            runner = self.make_runner([])
+            runner.add_stage("write", write, inputs=["total"], outputs=[output_path])
+            return runner
+
+        make_runner().run("write")
+        runner = make_runner()
+        runner.run("write")
+        self.assertEqual(self.statuses(runner)[-1], ("write", "hit"))
+
+        with open(output_path, "w") as f:
+            f.write("edited")
+        runner = make_runner()
+        runner.run("write")
+        self.assertEqual(self.statuses(runner)[-1], ("write", "miss"))
+        with open(output_path) as f:
+            self.assertEqual(f.read(), "318")
+
+    def test_explain(self):
+        """
+        explain() lists each stage run with its status, key and inputs.
+        """
+        runner = self.make_runner([])
+        runner.run("total")
+        keys = [key[:12] for _, _, key in runner.report]
+
+        self.assertEqual(runner.explain(), [
+            f"load  miss {keys[0]}  inputs: fleet.csv",
+            f"limit miss {keys[1]}  inputs: limit.txt",
+            f"clean miss {keys[2]}  inputs: load, limit",
+            f"total miss {keys[3]}  inputs: clean",
+        ])
+
+    def test_concurrent_writers_of_the_same_entry(self):
+        """
+        Writers storing the same key at once, as shared dataset workers do, neither collide nor leave
+        temporary files behind.
+        """
+        runner = self.make_runner([])
+        runner.run("total")
+        stage = runner.stages["total"]
+        cache_path = os.path.join(self.cache_directory, f"total-{runner.report[-1][2]}.pkl")
+        value_bytes = pickle.dumps(318)
+
+        def store(_):
+            for _ in range(50):
+                runner.store_entry(cache_path, stage, value_digest(318), value_bytes)
+                self.assertIsNotNone(runner.load_entry(cache_path, stage))
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(store, range(6)))
+
+        self.assertEqual(pickle.loads(runner.load_entry(cache_path, stage)["value_bytes"]), 318)
+        self.assertEqual([name for name in os.listdir(self.cache_directory) if name.endswith(".tmp")], [])
+
+    def test_value_digest(self):
+        """
+        Equal data has the same digest however it was produced, and a changed dtype or value does not.
+        """
+        frame = pd.DataFrame({"Reg": ["ZGAAA", "ZGAAB"], "Total": [138, 180]})
+        report = {"orphan_legs": 0, "examples": []}
+
+        self.assertEqual(value_digest(frame), value_digest(pickle.loads(pickle.dumps(frame))))
+        self.assertEqual(value_digest((frame, report)), value_digest((frame.copy(), dict(report))))
+        self.assertNotEqual(value_digest(frame), value_digest(frame.astype({"Total": "float64"})))
+        self.assertNotEqual(value_digest(frame), value_digest(frame.assign(Total=[138, 181])))
+
+
 if __name__ == "__main__":
     unittest.main()